@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# --- RESUMABLE BATCH JOBS ---
+# Offline jobs over completed interviews (summaries, deferred grading) share one shape:
+# load each finished session from the store, make a few LLM calls for it on the gateway
+# loop with a semaphore bounding how many sessions are in progress, and commit the
+# result to an output database as soon as it is done. The output database doubles as
+# the checkpoint: sessions that already have a result are skipped, so an interrupted
+# run resumes where it stopped.
+
+logger = logging.getLogger(__name__)
+
+
+class BatchCheckpoint:
+    """
+    Output database with one JSON result per session in `table`, stored in `column`,
+    plus any scalar `columns` ({name: SQL type}) saved alongside it for querying.
+    """
+
+    def __init__(self, path: str, table: str, column: str, columns: dict = None):
+        self.table = table
+        self.column = column
+        self.columns = list(columns or {})
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        extra = "".join(f", {name} {sql_type}" for name, sql_type in (columns or {}).items())
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"session_id TEXT PRIMARY KEY, {column} TEXT NOT NULL{extra}, created REAL NOT NULL)"
+        )
+
+    def done(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute(f"SELECT session_id FROM {self.table}")}
+
+    def save(self, session_id: str, result: dict, **columns):
+        names = ["session_id", self.column, *self.columns, "created"]
+        values = [session_id, json.dumps(result), *(columns.get(name) for name in self.columns), time.time()]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                values,
+            )
+
+    def get(self, session_id: str):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self.column} FROM {self.table} WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def export_jsonl(self, path: str) -> int:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT session_id, {self.column} FROM {self.table} ORDER BY created").fetchall()
+        with open(path, "w") as f:
+            for session_id, result in rows:
+                f.write(json.dumps({"session_id": session_id, **json.loads(result)}) + "\n")
+        return len(rows)
+
+
+async def run_batch(store, session_ids: list, checkpoint: BatchCheckpoint, process, concurrency: int,
+                    done_key: str = "done", rate_key: str = "per_minute") -> dict:
+    """
+    Runs `process(state)` -> (result, columns) for every session not yet in the checkpoint,
+    at most `concurrency` at a time, saving each result as soon as it is ready. Returns
+    counts (with finished sessions under `done_key`) and throughput (under `rate_key`).
+    """
+    finished = checkpoint.done()
+    pending = [session_id for session_id in session_ids if session_id not in finished]
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"skipped": len(session_ids) - len(pending), done_key: 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run_one(session_id):
+        async with semaphore:
+            state = await asyncio.to_thread(store.load, session_id)
+            if state is None:
+                return
+            try:
+                result, columns = await process(state)
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning("Could not process %s: %s", session_id, e)
+                return
+            await asyncio.to_thread(checkpoint.save, session_id, result, **columns)
+            counts[done_key] += 1
+
+    await asyncio.gather(*(run_one(session_id) for session_id in pending))
+    elapsed = time.perf_counter() - started
+    counts["elapsed_seconds"] = round(elapsed, 2)
+    counts[rate_key] = round(counts[done_key] * 60 / elapsed, 1) if elapsed else None
+    return counts
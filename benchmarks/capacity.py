@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_groq import DEFAULT_MODEL_LATENCY, fake_payload, parse_latency
+from benchmarks.interview_bench import percentiles, rss_mb
+
+# --- CAPACITY SIMULATOR ---
+# Answers "how many simultaneous interviews can one host sustain?". N virtual candidates
+# run whole interviews concurrently through the API server's InterviewService (session
+# store, per-session locks, bounded worker pool) with a stubbed LLM that sleeps for a
+# sampled model latency instead of calling out. Candidates think between turns and mix
+# in the awkward paths: invalid emails and phones, vague answers that trigger the
+# "elaborate" follow-up, and multi-role answers that need a clarifying choice. N grows
+# level by level (earlier candidates keep going); each level is measured for a fixed
+# window after a warm-up, until the p95 turn latency SLO or the error budget breaks.
+# The per-level results form the capacity curve.
+#
+#   python -m benchmarks.capacity --start 50 --max 5000 --duration 30 --slo-p95-ms 2000 --output capacity.json
+
+_LATEST_RESPONSE = re.compile(r'\*\*Candidate\'s Latest Response:\*\* "(.*)"')
+_ASSESSMENT_ANSWER = re.compile(r'(?:- The Candidate\'s Answer To It:|\*\*The Candidate\'s Answer:\*\*) "(.*)"')
+_ROLE_SEPARATORS = re.compile(r"\s*(?:,|/|\band\b|\bor\b)\s*")
+
+
+def latest_answer(messages: list) -> str:
+    user = messages[-1]["content"] if messages else ""
+    match = _LATEST_RESPONSE.search(user) or _ASSESSMENT_ANSWER.search(user)
+    return match.group(1) if match else ""
+
+
+def stub_payload(prompt) -> dict:
+    """fake_payload, adjusted to the candidate's latest answer where the real model's reply would depend on it."""
+    from prompts import prompt_kind, to_messages
+    messages = to_messages(prompt)
+    payload = fake_payload(messages)
+    kind, answer = prompt_kind(prompt), latest_answer(messages)
+    if kind == "position":
+        roles = [role for role in _ROLE_SEPARATORS.split(answer) if role]
+        payload = {"role_count": len(roles), "roles": roles,
+                   "response": "Which one would you like to be assessed for?" if len(roles) > 1 else payload["response"]}
+    elif kind == "position_choice":
+        payload = {"role_chosen": answer, "response": "Great choice. Where are you currently located?"}
+    elif kind in ("name", "email", "phone", "experience"):
+        # These prompts are only reached when the deterministic checks rejected the answer.
+        payload = {"is_valid": False, "response": "That doesn't look right. Could you provide it again?"}
+    elif kind in ("assessment", "progression") and len(answer.split()) <= 2 and answer.lower() not in ("pass", "no idea"):
+        question = "Could you elaborate on how you would approach it?"
+        payload = {"action_needed": "elaboration_required", "full_response": f"Tell me a bit more. {question}",
+                   "new_question_asked": question}
+    return payload
+
+
+class StubLLM:
+    """
+    The engine's LLM callable and prefetch submitter, without a network: each call
+    sleeps for a latency sampled per routed model and returns a canned JSON reply.
+    """
+
+    def __init__(self, latency: str, model_latency: dict, prefetch_workers: int = 64):
+        from routing import profile_for
+        self._profile_for = profile_for
+        self._latency = parse_latency(latency)
+        self._model_latency = {model: parse_latency(spec) for model, spec in model_latency.items()}
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="stub-prefetch")
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, prompt, stream_field=None):
+        model = self._profile_for(prompt).model
+        time.sleep(self._model_latency.get(model, self._latency)())
+        with self._lock:
+            self.calls += 1
+        return json.dumps(stub_payload(prompt))
+
+    def submit(self, prompt):
+        return self._executor.submit(self, prompt)
+
+    def close(self):
+        """Drops prefetches that have not started, so the run exits without waiting on them."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- VIRTUAL CANDIDATES ---
+
+class CandidateScript:
+    """Generates one candidate's answers for each stage, with configurable rates of awkward input."""
+
+    def __init__(self, rng: random.Random, invalid_rate: float, vague_rate: float, multi_role_rate: float):
+        self.rng = rng
+        self.invalid_rate = invalid_rate
+        self.vague_rate = vague_rate
+        self.multi_role_rate = multi_role_rate
+
+    def _pick(self, rate: float, awkward: list, normal: list) -> str:
+        return self.rng.choice(awkward if self.rng.random() < rate else normal)
+
+    def answer(self, state) -> str:
+        stage = state.conversation_stage
+        if stage in ("greeting", "gathering_name"):
+            return self._pick(self.invalid_rate, ["Jane", "me", "42"], ["Jane Doe", "Arjun Mehta", "Maria Garcia"])
+        if stage == "gathering_email":
+            return self._pick(self.invalid_rate, ["jane at example dot com", "jane@"], ["jane.doe@example.com", "arjun@mail.example.org"])
+        if stage == "gathering_phone":
+            return self._pick(self.invalid_rate, ["12345", "call me maybe"], ["9876543210", "(123) 456-7890"])
+        if stage == "gathering_experience":
+            return self._pick(self.invalid_rate, ["five", "a lot"], ["2", "5", "9"])
+        if stage == "gathering_position":
+            if state.awaiting_position_choice:
+                return "Backend Engineer"
+            return self._pick(self.multi_role_rate, ["Backend Engineer and Data Engineer", "SRE, DevOps Engineer"],
+                              ["Backend Engineer", "Data Engineer"])
+        if stage == "gathering_location":
+            return self.rng.choice(["Pune", "Berlin, Germany", "somewhere near the coast"])
+        if stage == "gathering_tech_stack":
+            return self.rng.choice(["Python, Django, PostgreSQL", "Java and Spring Boot", "Go, Redis, Kubernetes"])
+        if stage == "assessment_start":
+            return "yes"
+        if stage == "in_assessment":
+            return self._pick(self.vague_rate, ["yes", "sure", "pass"], [
+                "I would start by profiling the hot path, then look at allocations and caches that grow without bound.",
+                "For mostly read-heavy tables a covering index on the filter columns works well.",
+            ])
+        if stage == "coding_challenge":
+            return "I would iterate once, tracking the largest and second-largest values seen so far."
+        return "Thank you!"
+
+
+class LoadRun:
+    """
+    The population of virtual candidates, which only grows as the ramp proceeds. Every
+    candidate runs interviews back to back; each turn is recorded as (finished_at,
+    latency_ms, error) so a level can be measured over any time window.
+    """
+
+    # Rough number of turns in an interview, used to spread new candidates across stages.
+    TYPICAL_TURNS = 18
+
+    def __init__(self, service, think_ms: str, rates: dict, seed: int, max_turns: int = 60):
+        self.service = service
+        self.think = parse_latency(think_ms)
+        self.rates = rates
+        self.seed = seed
+        self.max_turns = max_turns
+        self.samples = []
+        self.tasks = []
+
+    async def _candidate(self, n: int, start_delay: float):
+        rng = random.Random(self.seed + n)
+        script = CandidateScript(rng, **self.rates)
+        await asyncio.sleep(start_delay)
+        # Play a random number of opening turns without pausing, so the population is spread
+        # across stages as in steady state instead of everyone starting at the greeting.
+        fast_forward = rng.randrange(self.TYPICAL_TURNS)
+        while True:
+            state = self.service.create()
+            for turn in range(self.max_turns):
+                if state.conversation_stage == "finished":
+                    break
+                if turn >= fast_forward:
+                    await asyncio.sleep(self.think())
+                started = time.perf_counter()
+                try:
+                    state, _ = await self.service.step(state.session_id, script.answer(state))
+                except Exception as e:
+                    self.samples.append((time.monotonic(), (time.perf_counter() - started) * 1000, type(e).__name__))
+                    break
+                self.samples.append((time.monotonic(), (time.perf_counter() - started) * 1000, None))
+            await self.service.delete(state.session_id)
+            fast_forward = 0
+
+    def grow(self, candidates: int, spread: float):
+        """Adds candidates up to `candidates`, starting them at random over `spread` seconds."""
+        rng = random.Random(self.seed + len(self.tasks))
+        for n in range(len(self.tasks), candidates):
+            self.tasks.append(asyncio.create_task(self._candidate(n, rng.uniform(0, spread))))
+
+    def window(self, start: float, end: float) -> tuple:
+        latencies = [latency for at, latency, error in self.samples if start <= at < end and error is None]
+        errors = [error for at, _, error in self.samples if start <= at < end and error is not None]
+        return latencies, errors
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def measure_level(run: LoadRun, candidates: int, warmup: float, duration: float) -> dict:
+    run.grow(candidates, spread=warmup)
+    await asyncio.sleep(warmup)
+    cpu_before = resource.getrusage(resource.RUSAGE_SELF)
+    window_start = time.monotonic()
+    await asyncio.sleep(duration)
+    window_end = time.monotonic()
+    cpu_after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_seconds = (cpu_after.ru_utime - cpu_before.ru_utime) + (cpu_after.ru_stime - cpu_before.ru_stime)
+    latencies, errors = run.window(window_start, window_end)
+    elapsed = window_end - window_start
+    return {
+        "candidates": candidates,
+        "turns": len(latencies),
+        "turns_per_second": round(len(latencies) / elapsed, 2),
+        "turn_latency_ms": percentiles(latencies),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / max(1, len(latencies) + len(errors)), 4),
+        "cpu_cores": round(cpu_seconds / elapsed, 2),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def next_level(candidates: int, step: int, factor: float) -> int:
+    return candidates + step if step else max(candidates + 1, int(candidates * factor))
+
+
+async def ramp(service, args, rates: dict) -> tuple:
+    """Grows the population level by level; returns (curve, capacity) once the SLO breaks or --max is passed."""
+    run = LoadRun(service, args.think_time, rates, args.seed)
+    curve, capacity, candidates = [], None, args.start
+    try:
+        while candidates <= args.max:
+            level = await measure_level(run, candidates, args.warmup, args.duration)
+            p95 = level["turn_latency_ms"].get("p95")
+            level["within_slo"] = p95 is not None and p95 <= args.slo_p95_ms and level["error_rate"] <= args.max_error_rate
+            curve.append(level)
+            print(f"{candidates:>6} candidates: {level['turns_per_second']:>8} turns/s, p95 {p95} ms, "
+                  f"errors {level['errors']}, cpu {level['cpu_cores']} cores, rss {level['rss_mb']} MB")
+            if not level["within_slo"]:
+                break
+            capacity = candidates
+            candidates = next_level(candidates, args.step, args.factor)
+    finally:
+        await run.stop()
+    return curve, capacity
+
+
+def run_capacity(args) -> dict:
+    from engine import InterviewEngine
+    from prefetch import Prefetcher
+    from server import InterviewService
+    from session_store import MemorySessionStore
+
+    model_latency = dict(spec.split("=", 1) for spec in (args.model_latency or DEFAULT_MODEL_LATENCY))
+    llm = StubLLM(args.latency, model_latency)
+    engine = InterviewEngine(llm, prefetcher=Prefetcher(llm.submit))
+    service = InterviewService(engine, MemorySessionStore(), workers=args.workers)
+    rates = {"invalid_rate": args.invalid_rate, "vague_rate": args.vague_rate, "multi_role_rate": args.multi_role_rate}
+    try:
+        curve, capacity = asyncio.run(ramp(service, args, rates))
+    finally:
+        llm.close()
+    return {
+        "slo": {"p95_ms": args.slo_p95_ms, "max_error_rate": args.max_error_rate},
+        "capacity_candidates": capacity,
+        "config": {"workers": args.workers, "warmup_seconds": args.warmup, "duration_seconds": args.duration,
+                   "think_time": args.think_time, "latency": args.latency, "model_latency": model_latency, **rates},
+        "llm_calls": llm.calls,
+        "curve": curve,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent simulated interviews until the latency SLO breaks.")
+    parser.add_argument("--start", type=int, default=25, help="Concurrent candidates at the first level.")
+    parser.add_argument("--max", type=int, default=5000, help="Stop ramping past this many candidates.")
+    parser.add_argument("--factor", type=float, default=2.0, help="Multiply the candidates by this at each level.")
+    parser.add_argument("--step", type=int, default=0, help="Add this many candidates per level instead of multiplying.")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds new candidates ramp in before a level is measured.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds each level is measured for.")
+    parser.add_argument("--think-time", default="uniform:2000,8000", help="Candidate pause before each answer (latency spec, ms).")
+    parser.add_argument("--latency", default="lognormal:400,0.5", help="Stub LLM latency spec for the default model (ms).")
+    parser.add_argument("--model-latency", action="append", default=None, metavar="MODEL=SPEC",
+                        help=f"Stub latency for one model (repeatable). Default: {DEFAULT_MODEL_LATENCY[0]}.")
+    parser.add_argument("--workers", type=int, default=128, help="InterviewService worker threads (SERVER_WORKERS).")
+    parser.add_argument("--slo-p95-ms", type=float, default=2000.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--invalid-rate", type=float, default=0.15, help="Share of invalid name/email/phone/experience answers.")
+    parser.add_argument("--vague-rate", type=float, default=0.25, help="Share of vague assessment answers.")
+    parser.add_argument("--multi-role-rate", type=float, default=0.3, help="Share of answers naming several positions.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    report = run_capacity(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
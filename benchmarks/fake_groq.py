@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+import tornado.web
+
+from similarity import coverage_summary
+
+# --- FAKE GROQ SERVER ---
+# A local stand-in for Groq's OpenAI-compatible chat-completions endpoint. It recognizes
+# which prompt from prompts.py it was sent and answers with a JSON payload of the shape
+# that prompt asks for, after a latency drawn from a configurable distribution plus a
+# per-token generation time; each model can have its own latency distribution. Malformed
+# JSON and 429 responses can be injected at given rates. Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+TECH_QUESTIONS = [
+    "How does garbage collection work in this language?",
+    "What is the difference between a process and a thread?",
+    "How would you design an index for a table that is mostly read?",
+    "Explain how you would debug a memory leak in production.",
+    "What trade-offs do you consider when choosing a caching strategy?",
+    "How do you keep a long-running migration safe to roll back?",
+    "When would you reach for a message queue instead of a direct API call?",
+    "How do you decide what belongs in a unit test versus an integration test?",
+    "What happens, step by step, when a request reaches your web server?",
+    "How would you find the cause of a slow database query?",
+]
+
+LOGIC_QUESTIONS = [
+    "Describe the logic to find the second-largest number in a list.",
+    "How would you structure code to detect duplicate entries in a file?",
+]
+
+# The small routed model answers several times faster than the default --latency.
+DEFAULT_MODEL_LATENCY = ["llama-3.1-8b-instant=lognormal:100,0.5"]
+
+
+def parse_latency(spec: str):
+    """
+    Parses a latency spec into a sampler returning seconds: "constant:MS",
+    "uniform:LO_MS,HI_MS" or "lognormal:MEDIAN_MS,SIGMA".
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "constant":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+FAKE_PROFILE = {
+    "full_name": "Jane Doe", "email": "jane.doe@example.com", "phone_number": "9876543210", "experience_years": "5",
+    "desired_position": "Backend Engineer", "current_location": "Pune", "tech_stack": "Python, Django, PostgreSQL",
+}
+
+
+def unasked(questions: list, messages: list) -> list:
+    """The questions not yet asked or listed as covered in the conversation, as a compliant model would pick."""
+    text = " ".join(message["content"] for message in messages)
+    return [q for q in questions if q not in text and coverage_summary([q]) not in text] or questions
+
+
+def fake_payload(messages: list) -> dict:
+    """Builds a response in the JSON shape the recognized prompt asks for."""
+    system = messages[0]["content"] if messages else ""
+    if '"grades"' in system:
+        numbers = re.findall(r"^(\d+)\. \[", messages[-1]["content"], re.MULTILINE)
+        return {"grades": [{"number": int(number), "score": random.randint(1, 5), "rationale": "Covers the main points."}
+                           for number in numbers]}
+    if '"current_location"' in system:
+        # Extracts only the fields whose values the candidate's message actually contains.
+        text = messages[-1]["content"]
+        return {key: value if value in text else None for key, value in FAKE_PROFILE.items()}
+    if '"role_chosen"' in system:
+        return {"role_chosen": "Backend Engineer", "response": "Great choice. Where are you currently located?"}
+    if '"role_count"' in system:
+        return {"role_count": 1, "roles": ["Backend Engineer"], "response": "Great. Where are you currently located?"}
+    if '"action_needed"' in system:
+        question = random.choice(unasked(TECH_QUESTIONS, messages))
+        return {"action_needed": "move_on", "full_response": f"Thanks for the detail. {question}", "new_question_asked": question}
+    if "logic question" in system:
+        return {"question": random.choice(LOGIC_QUESTIONS)}
+    if '"questions"' in system:
+        return {"questions": random.sample(TECH_QUESTIONS, len(TECH_QUESTIONS))}
+    if '"question"' in system:
+        return {"question": random.choice(unasked(TECH_QUESTIONS, messages))}
+    if '"overall_summary"' in system:
+        return {"overall_summary": "The candidate completed the screening.", "technical_strengths": "- Fundamentals",
+                "areas_for_improvement": "- System design depth", "final_recommendation": "Recommend for a follow-up technical interview."}
+    if '"is_valid"' in system:
+        return {"is_valid": True, "response": "Thank you, that's recorded."}
+    return {"response": "Thank you, that's noted."}
+
+
+class CompletionsHandler(tornado.web.RequestHandler):
+    def initialize(self, config: dict, stats: dict):
+        self.config = config
+        self.stats = stats
+
+    async def post(self):
+        body = json.loads(self.request.body)
+        config = self.config
+        self.stats["requests"] += 1
+
+        if random.random() < config["rate_limit_rate"]:
+            self.stats["rate_limited"] += 1
+            self.set_status(429)
+            self.set_header("Retry-After", str(config["retry_after"]))
+            self.finish({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}})
+            return
+
+        content = json.dumps(fake_payload(body["messages"]))
+        if random.random() < config["malformed_rate"]:
+            self.stats["malformed"] += 1
+            content = content[:max(1, len(content) // 2)]
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in body["messages"])
+        completion_tokens = estimate_tokens(content)
+        self.stats["prompt_tokens"] += prompt_tokens
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        await asyncio.sleep(config["model_latency"].get(body["model"], config["latency"])())
+        per_token = 1 / config["tokens_per_second"]
+        base = {"id": "fake", "created": int(time.time()), "model": body["model"]}
+
+        if not body.get("stream"):
+            await asyncio.sleep(completion_tokens * per_token)
+            self.finish({**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]})
+            return
+
+        self.set_header("Content-Type", "text/event-stream")
+        step = 16
+        for start in range(0, len(content), step):
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}]}
+            self.write(f"data: {json.dumps(chunk)}\n\n")
+            await self.flush()
+            await asyncio.sleep(estimate_tokens(content[start:start + step]) * per_token)
+        final = {**base, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+        self.finish()
+
+
+def make_config(latency: str = "lognormal:400,0.5", tokens_per_second: float = 250.0,
+                malformed_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 0.2,
+                model_latency: dict = None) -> dict:
+    model_latency = model_latency or {}
+    return {"latency": parse_latency(latency), "latency_spec": latency, "tokens_per_second": tokens_per_second,
+            "malformed_rate": malformed_rate, "rate_limit_rate": rate_limit_rate, "retry_after": retry_after,
+            "model_latency": {model: parse_latency(spec) for model, spec in model_latency.items()},
+            "model_latency_spec": model_latency}
+
+
+class FakeGroqServer:
+    """Runs the fake endpoint on its own event-loop thread; `url` is the GROQ_BASE_URL to use."""
+
+    def __init__(self, port: int = 0, **config):
+        self.config = make_config(**config)
+        self.stats = {"requests": 0, "rate_limited": 0, "malformed": 0, "prompt_tokens": 0}
+        self.port = port
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="fake-groq", daemon=True)
+
+    def _serve(self):
+        async def serve():
+            app = tornado.web.Application([
+                (r"/openai/v1/chat/completions", CompletionsHandler, {"config": self.config, "stats": self.stats}),
+            ], log_function=lambda handler: None)
+            server = app.listen(self.port, address="127.0.0.1")
+            self.port = next(iter(server._sockets.values())).getsockname()[1]
+            self._ready.set()
+            await asyncio.Event().wait()
+        asyncio.run(serve())
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="lognormal:400,0.5", help='"constant:MS", "uniform:LO,HI" or "lognormal:MEDIAN_MS,SIGMA".')
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of responses with truncated JSON.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--model-latency", action="append", default=None, metavar="MODEL=SPEC",
+                        help="Latency spec for one model (repeatable); others use --latency. "
+                             f"Default: {DEFAULT_MODEL_LATENCY[0]}.")
+
+
+def server_config(args) -> dict:
+    model_latency = dict(spec.split("=", 1) for spec in (args.model_latency or DEFAULT_MODEL_LATENCY))
+    return {"latency": args.latency, "tokens_per_second": args.tokens_per_second, "malformed_rate": args.malformed_rate,
+            "rate_limit_rate": args.rate_limit_rate, "retry_after": args.retry_after, "model_latency": model_latency}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Groq chat-completions server.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = FakeGroqServer(port=args.port, **server_config(args)).start()
+    print(f"Fake Groq listening on {server.url} (set GROQ_BASE_URL to this)")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# --- IMPORT-TIME PROFILE ---
+# Reports where a cold process spends its time importing, using `python -X importtime`
+# in a fresh interpreter (so nothing is already cached in sys.modules). The startup set
+# is what app.py imports before its first paint; the deferred set is what it loads only
+# when a stage needs it, measured on top of the startup set so shared dependencies are
+# not counted twice.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_MODULES = [
+    "streamlit", "dotenv", "streaming", "prefetch", "engine", "session_store", "llm",
+    "scheduler", "question_bank", "transcription", "metrics",
+]
+DEFERRED_MODULES = ["groq", "httpx", "streamlit_mic_recorder", "speech_recognition", "pydub"]
+
+
+def profile_imports(modules: list, preload: list = ()) -> list:
+    """
+    Imports `modules` in a fresh interpreter (after `preload`, which is not reported) and
+    returns one {"module", "self_us", "cumulative_us", "depth"} entry per import.
+    """
+    code = "".join(f"import {module}\n" for module in preload)
+    code += "import sys; sys.stderr.write('-- profile --\\n')\n"
+    code += "".join(f"import {module}\n" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    _, _, report = result.stderr.partition("-- profile --\n")
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return entries
+
+
+def summarize(entries: list, top: int) -> dict:
+    roots = [entry for entry in entries if entry["depth"] == 0]
+    return {
+        "total_ms": round(sum(entry["cumulative_us"] for entry in roots) / 1000, 1),
+        "by_import": [{"module": entry["module"], "ms": round(entry["cumulative_us"] / 1000, 1)}
+                      for entry in sorted(roots, key=lambda entry: -entry["cumulative_us"])[:top]],
+        "slowest_modules": [{"module": entry["module"], "self_ms": round(entry["self_us"] / 1000, 1)}
+                            for entry in sorted(entries, key=lambda entry: -entry["self_us"])[:top]],
+    }
+
+
+def print_summary(title: str, summary: dict):
+    print(f"{title}: {summary['total_ms']} ms")
+    for entry in summary["by_import"]:
+        print(f"  {entry['ms']:>8.1f} ms  {entry['module']}")
+    print("  slowest individual modules (self time):")
+    for entry in summary["slowest_modules"]:
+        print(f"  {entry['self_ms']:>8.1f} ms  {entry['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down cold-start import time.")
+    parser.add_argument("--modules", nargs="+", default=STARTUP_MODULES, help="Modules imported at startup.")
+    parser.add_argument("--deferred", nargs="*", default=DEFERRED_MODULES, help="Modules loaded later, on demand.")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    report = {"startup": summarize(profile_imports(args.modules), args.top)}
+    if args.deferred:
+        report["deferred"] = summarize(profile_imports(args.deferred, preload=args.modules), args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print_summary("Startup imports", report["startup"])
+    if "deferred" in report:
+        print_summary("Deferred imports (on first use)", report["deferred"])
+
+
+if __name__ == "__main__":
+    main()
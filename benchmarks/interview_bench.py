@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_groq import FakeGroqServer, add_server_arguments, server_config
+
+# --- INTERVIEW BENCHMARK ---
+# Drives simulated candidates through every stage of the interview (gathering, the
+# technical assessment, the coding challenge and the conclusion) with the headless
+# InterviewEngine and the real LLM gateway, against the local fake Groq server. Reports
+# turn latency percentiles, LLM calls per interview, prompt tokens per turn and memory,
+# as JSON so runs can be compared for regressions.
+#
+#   python -m benchmarks.interview_bench --interviews 50 --concurrency 10 --output result.json
+
+MAX_TURNS_PER_INTERVIEW = 40
+
+CANDIDATE_ANSWERS = {
+    "gathering_profile": [
+        "Hi, I'm Jane Doe (jane.doe@example.com, 9876543210), a Backend Engineer with 5 years of experience, "
+        "based in Pune. I mostly work with Python, Django, PostgreSQL.",
+        "Jane Doe\nBackend Engineer - Pune\njane.doe@example.com | 9876543210\n5 years of experience\n"
+        "Skills: Python, Django, PostgreSQL",
+        "I'm Jane Doe, a Backend Engineer in Pune working with Python, Django, PostgreSQL.",
+    ],
+    "gathering_name": ["Jane Doe", "my name is Arjun Mehta", "I'm Maria Garcia"],
+    "gathering_email": ["jane.doe@example.com", "arjun@mail.example.org"],
+    "gathering_phone": ["9876543210", "1234567890"],
+    "gathering_experience": ["5", "2", "9"],
+    "gathering_position": ["Backend Engineer", "Data Engineer"],
+    "gathering_location": ["Pune", "Berlin, Germany", "somewhere near the coast"],
+    "gathering_tech_stack": ["Python, Django, PostgreSQL", "Java and Spring Boot", "Go, Redis, Kubernetes"],
+    "assessment_start": ["yes", "ready"],
+    "in_assessment": [
+        "I would start by profiling the hot path, then look at allocations and any caches that grow without bound.",
+        "I'm not sure, could you rephrase that?",
+        "pass",
+        "It depends on the workload; for mostly read-heavy tables a covering index on the filter columns works well.",
+    ],
+    "coding_challenge": ["I would iterate once, tracking the largest and second-largest values seen so far."],
+    # Only reached when the closing message failed to parse; any input retries it.
+    "conclusion": ["Thank you!"],
+}
+
+
+# What a candidate in profile intake mode answers when asked for fields their intro left out.
+PROFILE_FOLLOW_UPS = {
+    "full_name": "Jane Doe", "email": "jane.doe@example.com", "phone_number": "9876543210", "experience_years": "5",
+    "desired_position": "Backend Engineer", "current_location": "Pune", "tech_stack": "Python, Django, PostgreSQL",
+}
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return {"count": len(ordered), "mean": round(sum(ordered) / len(ordered), 2), "p50": round(pick(0.50), 2),
+            "p95": round(pick(0.95), 2), "p99": round(pick(0.99), 2), "max": round(ordered[-1], 2)}
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class InstrumentedLLM:
+    """Wraps the gateway as the engine's LLM callable and prefetch submitter, counting calls and prompt tokens."""
+
+    def __init__(self, gateway):
+        from prompts import to_messages
+        from history import estimate_tokens
+        self.gateway = gateway
+        self._to_messages = to_messages
+        self._estimate_tokens = estimate_tokens
+        self._local = threading.local()
+
+    def _count(self, prompt):
+        tokens = sum(self._estimate_tokens(message["content"]) for message in self._to_messages(prompt))
+        counters = getattr(self._local, "counters", None)
+        if counters is not None:
+            counters["calls"] += 1
+            counters["prompt_tokens"] += tokens
+
+    def start_turn(self):
+        self._local.counters = {"calls": 0, "prompt_tokens": 0}
+        return self._local.counters
+
+    def __call__(self, prompt, stream_field=None):
+        self._count(prompt)
+        try:
+            if stream_field:
+                return "".join(self.gateway.stream(prompt))
+            return self.gateway.complete(prompt)
+        except Exception:
+            return None
+
+    def submit(self, prompt):
+        from scheduler import PRIORITY_PREFETCH
+        self._count(prompt)
+        return self.gateway.submit(prompt, priority=PRIORITY_PREFETCH)
+
+
+def run_interview(engine, llm, seed: int) -> dict:
+    """Plays one candidate through the interview and returns its per-turn measurements."""
+    rng = random.Random(seed)
+    state = engine.new_state()
+    turns = []
+    while state.conversation_stage != "finished" and len(turns) < MAX_TURNS_PER_INTERVIEW:
+        stage = state.conversation_stage
+        if stage == "greeting":
+            stage = "gathering_profile" if engine.intake_mode == "profile" else "gathering_name"
+        if stage == "gathering_profile" and turns:
+            answer = ", ".join(PROFILE_FOLLOW_UPS[key] for key, value in state.candidate_info.items() if not value)
+        else:
+            answer = rng.choice(CANDIDATE_ANSWERS[stage])
+        counters = llm.start_turn()
+        started = time.perf_counter()
+        state, _ = engine.step(state, answer)
+        turns.append({"stage": stage, "latency_ms": (time.perf_counter() - started) * 1000, **counters})
+    engine.reset(state)
+    return {"completed": state.conversation_stage == "finished", "turns": turns, "state": state}
+
+
+def until_first_question(turns: list) -> list:
+    """The turns up to and including the one that asked the first technical question."""
+    for n, turn in enumerate(turns):
+        if turn["stage"] == "assessment_start":
+            return turns[:n + 1]
+    return turns
+
+
+def grade_interviews(gateway, states: list) -> dict:
+    """Grades every finished interview concurrently, as grading.py does after the fact; returns throughput."""
+    import asyncio
+    from grading import Grader
+
+    grader = Grader(gateway)
+
+    async def grade_all():
+        return await asyncio.gather(*(grader.grade(state.answers, state.candidate_info) for state in states),
+                                    return_exceptions=True)
+
+    started = time.perf_counter()
+    reports = gateway.run(grade_all()).result()
+    elapsed = time.perf_counter() - started
+    graded = [report for report in reports if isinstance(report, dict)]
+    return {
+        "interviews": len(graded),
+        "failed": len(reports) - len(graded),
+        "answers": sum(len(report["answers"]) for report in graded),
+        "ungraded_answers": sum(report["ungraded"] for report in graded),
+        "elapsed_seconds": round(elapsed, 2),
+        "interviews_per_minute": round(len(graded) * 60 / elapsed, 1) if elapsed else None,
+    }
+
+
+def run_benchmark(interviews: int, concurrency: int, seed: int = 0, intake_mode: str = "stepwise",
+                  grading_mode: str = "live") -> dict:
+    from engine import InterviewEngine
+    from llm import close_gateway, get_gateway
+    from metrics import JSON_REPAIRS, LLM_ESCALATIONS, LLM_TOKENS, QUESTION_REPEATS
+    from routing import PROFILES
+    from prefetch import Prefetcher
+    from session_store import state_size
+
+    gateway = get_gateway()
+    llm = InstrumentedLLM(gateway)
+    # No question bank: it would bypass most LLM calls, so the live path is what gets measured.
+    engine = InterviewEngine(llm, prefetcher=Prefetcher(llm.submit), intake_mode=intake_mode, grading_mode=grading_mode)
+
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda n: run_interview(engine, llm, seed + n), range(interviews)))
+    elapsed = time.perf_counter() - started
+
+    turns = [turn for result in results for turn in result["turns"]]
+    by_stage = {}
+    for turn in turns:
+        by_stage.setdefault(turn["stage"], []).append(turn["latency_ms"])
+    peak_rss = rss_mb()
+    report = {
+        "interviews": interviews,
+        "concurrency": concurrency,
+        "intake_mode": intake_mode,
+        "grading_mode": grading_mode,
+        "completed": sum(result["completed"] for result in results),
+        "elapsed_seconds": round(elapsed, 2),
+        "turns_per_second": round(len(turns) / elapsed, 2) if elapsed else None,
+        "turn_latency_ms": percentiles([turn["latency_ms"] for turn in turns]),
+        "stage_latency_ms": {stage: percentiles(values) for stage, values in by_stage.items()},
+        "turns_per_interview": percentiles([len(result["turns"]) for result in results]),
+        # Candidate turns, and engine time spent on them, before the first technical question.
+        "turns_to_first_question": percentiles([len(until_first_question(result["turns"])) for result in results]),
+        "time_to_first_question_ms": percentiles([sum(turn["latency_ms"] for turn in until_first_question(result["turns"]))
+                                                  for result in results]),
+        # Live calls are attributed to the turn that made them; prefetches to the turn that scheduled them.
+        "llm_calls_per_interview": percentiles([sum(turn["calls"] for turn in result["turns"]) for result in results]),
+        "prompt_tokens_per_turn": percentiles([turn["prompt_tokens"] for turn in turns]),
+        "memory": {
+            "baseline_rss_mb": round(baseline_rss, 1),
+            "peak_rss_mb": round(peak_rss, 1),
+            "peak_rss_per_concurrent_session_kb": round((peak_rss - baseline_rss) * 1024 / concurrency, 1),
+            "final_state_bytes": percentiles([state_size(result["state"]) for result in results]),
+        },
+        # Malformed responses fixed locally, fixed by one re-ask, or still unusable after it.
+        "json_repairs": {outcome: JSON_REPAIRS.total(outcome=outcome) for outcome in ("repaired", "retried", "retry_failed")},
+        "llm_escalations": LLM_ESCALATIONS.total(),
+        "question_repeats": {outcome: QUESTION_REPEATS.total(outcome=outcome) for outcome in ("regenerated", "kept", "dropped")},
+        "tokens_per_interview_by_model": {
+            profile.model: round(LLM_TOKENS.total(model=profile.model) / interviews, 1) for profile in PROFILES.values()
+        },
+        "gateway": gateway.metrics(),
+    }
+    if grading_mode == "deferred":
+        # Off the candidate's path: measured after every interview has finished.
+        report["grading"] = grade_interviews(gateway, [result["state"] for result in results if result["completed"]])
+    close_gateway()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the interview flow against a fake Groq server.")
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--intake", choices=["stepwise", "profile"], default="stepwise",
+                        help="Gather the profile one field per turn, or extract it from one free-form message.")
+    parser.add_argument("--grading", choices=["live", "deferred"], default="live",
+                        help="Evaluate answers during assessment turns, or grade them in one pass after each interview.")
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled (off by default).")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    server = FakeGroqServer(**server_config(args)).start()
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    if not args.cache:
+        os.environ["LLM_CACHE_BACKEND"] = "off"
+
+    report = run_benchmark(args.interviews, args.concurrency, seed=args.seed, intake_mode=args.intake,
+                           grading_mode=args.grading)
+    report["fake_server"] = {**{key: value for key, value in server.config.items() if key not in ("latency", "model_latency")},
+                             **server.stats}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
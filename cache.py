@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from decoding import decode_response, ResponseDecodeError
+from metrics import LLM_CACHE
+
+# --- LLM RESPONSE CACHE ---
+# Several prompts only vary by a handful of profile fields (coding questions by role,
+# experience and stack; topic openers by topic, role and experience; the closing
+# message by name). Their raw JSON responses are cached under a canonicalized prompt
+# and model-parameter key so repeat generations are served locally. Only prompt
+# kinds listed in the cache's `stages` are ever cached, and only responses that decode
+# against their kind's schema, so a malformed reply is never replayed to other sessions.
+
+DEFAULT_CACHE_STAGES = "coding_question,first_question,conclusion"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonical_key(messages: list, params: dict) -> str:
+    """Hashes the prompt with whitespace collapsed, plus the model parameters."""
+    canonical = [[message["role"], _WHITESPACE.sub(" ", message["content"]).strip()] for message in messages]
+    payload = json.dumps([canonical, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every process on the host; evicts least recently used rows."""
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Applies a cache backend to the opted-in prompt kinds and counts hits and misses per kind."""
+
+    def __init__(self, backend, stages):
+        self.backend = backend
+        self.stages = set(stages)
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, kind: str, outcome: str):
+        with self._lock:
+            counters = self.stats.setdefault(kind, {"hits": 0, "misses": 0, "stores": 0, "rejected": 0})
+            counters[outcome] += 1
+        LLM_CACHE.inc(kind=kind, outcome=outcome)
+
+    def get(self, kind: str, messages: list, params: dict):
+        """Returns the cached raw response, or None on a miss or for kinds that are not cached."""
+        if kind not in self.stages:
+            return None
+        value = self.backend.get(canonical_key(messages, params))
+        self._count(kind, "hits" if value is not None else "misses")
+        return value
+
+    def put(self, kind: str, messages: list, params: dict, value: str):
+        """Stores a raw response if its kind is cached and it decodes against the kind's schema."""
+        if kind not in self.stages or not value:
+            return
+        try:
+            decode_response(value, kind)
+        except ResponseDecodeError:
+            self._count(kind, "rejected")
+            return
+        self.backend.set(canonical_key(messages, params), value)
+        self._count(kind, "stores")
+
+
+def build_cache_from_env():
+    """
+    Builds the response cache from LLM_CACHE_BACKEND ("memory", "sqlite" or "off"),
+    LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES and LLM_CACHE_STAGES.
+    """
+    backend_name = os.environ.get("LLM_CACHE_BACKEND", "memory").lower()
+    if backend_name == "off":
+        return None
+    ttl = float(os.environ.get("LLM_CACHE_TTL", "86400"))
+    max_entries = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000"))
+    if backend_name == "sqlite":
+        backend = SQLiteCache(os.environ.get("LLM_CACHE_PATH", "llm_cache.sqlite3"), max_entries=max_entries, ttl=ttl)
+    else:
+        backend = MemoryCache(max_entries=max_entries, ttl=ttl)
+    stages = [stage.strip() for stage in os.environ.get("LLM_CACHE_STAGES", DEFAULT_CACHE_STAGES).split(",") if stage.strip()]
+    return ResponseCache(backend, stages)
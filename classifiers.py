@@ -0,0 +1,169 @@
+import re
+from utils import is_valid_name
+from taxonomy import parse_stack
+
+# --- LOCAL FAST-PATH CLASSIFIERS ---
+# Deterministic checks for the name, location and tech-stack gathering stages.
+# Each classifier returns a (value, reply) tuple when it is confident about clean
+# input, or None so the caller can fall back to the LLM for anything ambiguous.
+
+# Words that pass the basic name check but signal a sentence rather than a name.
+NON_NAME_WORDS = {
+    "hello", "hi", "hey", "my", "name", "is", "i", "am", "im", "the", "a", "an", "and", "not",
+    "no", "yes", "why", "what", "who", "how", "you", "your", "please", "sure", "okay", "ok",
+    "thanks", "thank", "sorry", "dont", "want", "to", "this", "that", "it", "me", "call",
+    # Greetings, times of day and courtesies ("Good morning", "Nice day", "Ask later").
+    "good", "morning", "afternoon", "evening", "night", "day", "nice", "great", "fine", "welcome",
+    "greetings", "regards", "cheers", "dear", "sir", "madam", "maam", "there", "bye", "goodbye",
+    "today", "tomorrow", "later", "ask", "again", "pleasure", "meet", "glad", "happy",
+}
+
+# Job-title words: "Software Engineer" answers a different question.
+JOB_TITLE_WORDS = {
+    "engineer", "developer", "manager", "analyst", "scientist", "architect", "designer", "consultant",
+    "intern", "lead", "senior", "junior", "software", "data", "backend", "frontend", "fullstack", "devops",
+    "administrator", "admin", "tester", "programmer", "specialist", "director", "officer", "head",
+    "student", "fresher", "engineering", "development", "technician", "executive", "associate",
+}
+
+# Common words that are rarely a whole name on their own ("New", "Big", "Open").
+COMMON_WORDS = {
+    "new", "old", "big", "small", "best", "first", "last", "next", "just", "only", "very", "really",
+    "open", "free", "busy", "ready", "here", "now", "then", "soon", "maybe", "done", "well", "all",
+    "any", "some", "none", "one", "two", "north", "south", "east", "west", "city", "team", "work",
+}
+
+NAME_PREFIXES = re.compile(r"^(?:my name is|my full name is|i am|i'm|im|this is|it's|it is|call me)\s+", re.IGNORECASE)
+
+# A small gazetteer of countries, regions and common tech hubs (lowercase -> display form).
+LOCATION_GAZETTEER = {name.lower(): name for name in [
+    # Countries
+    "India", "United States", "USA", "US", "United Kingdom", "UK", "Canada", "Australia", "Germany",
+    "France", "Netherlands", "Ireland", "Spain", "Portugal", "Italy", "Switzerland", "Sweden", "Norway",
+    "Denmark", "Finland", "Poland", "Austria", "Belgium", "Czech Republic", "Romania", "Ukraine",
+    "Israel", "United Arab Emirates", "UAE", "Saudi Arabia", "Qatar", "Egypt", "Nigeria", "Kenya",
+    "South Africa", "Brazil", "Argentina", "Mexico", "Chile", "Colombia", "Japan", "China", "Singapore",
+    "Malaysia", "Indonesia", "Philippines", "Vietnam", "Thailand", "South Korea", "Pakistan",
+    "Bangladesh", "Sri Lanka", "Nepal", "New Zealand", "Turkey",
+    # Indian states and cities
+    "Maharashtra", "Karnataka", "Tamil Nadu", "Telangana", "Kerala", "Gujarat", "Delhi", "New Delhi",
+    "West Bengal", "Uttar Pradesh", "Rajasthan", "Punjab", "Haryana", "Madhya Pradesh",
+    "Pune", "Mumbai", "Bangalore", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Noida",
+    "Gurgaon", "Gurugram", "Ahmedabad", "Jaipur", "Kochi", "Indore", "Chandigarh", "Nagpur",
+    "Coimbatore", "Lucknow", "Bhopal", "Thane", "Navi Mumbai", "Mysore", "Trivandrum", "Vadodara",
+    # North America
+    "California", "Texas", "New York", "Washington", "Massachusetts", "Illinois", "Florida",
+    "Ontario", "British Columbia", "Quebec", "San Francisco", "Bay Area", "Silicon Valley",
+    "San Jose", "Los Angeles", "Seattle", "Austin", "Boston", "Chicago", "Denver", "Atlanta",
+    "New York City", "NYC", "Toronto", "Vancouver", "Montreal",
+    # Europe, Middle East, Asia-Pacific
+    "London", "Manchester", "Edinburgh", "Dublin", "Berlin", "Munich", "Hamburg", "Paris",
+    "Amsterdam", "Madrid", "Barcelona", "Lisbon", "Milan", "Zurich", "Stockholm", "Copenhagen",
+    "Oslo", "Helsinki", "Warsaw", "Krakow", "Prague", "Vienna", "Brussels", "Bucharest", "Kyiv",
+    "Tel Aviv", "Dubai", "Abu Dhabi", "Riyadh", "Doha", "Cairo", "Lagos", "Nairobi", "Cape Town",
+    "Johannesburg", "Tokyo", "Seoul", "Beijing", "Shanghai", "Shenzhen", "Hong Kong", "Taipei",
+    "Kuala Lumpur", "Jakarta", "Manila", "Bangkok", "Ho Chi Minh City", "Hanoi", "Sydney",
+    "Melbourne", "Auckland", "Karachi", "Lahore", "Dhaka", "Colombo", "Kathmandu", "Istanbul",
+    "Sao Paulo", "Buenos Aires", "Mexico City", "Santiago", "Bogota",
+]}
+
+LOCATION_PREFIXES = re.compile(
+    r"^(?:i(?:'m| am)?\s+(?:currently\s+)?(?:live|living|based|located|staying)\s+(?:in|at)|"
+    r"i(?:'m| am)\s+(?:currently\s+)?(?:in|from)|currently\s+(?:in|at)|based\s+(?:in|out of)|from|in)\s+",
+    re.IGNORECASE,
+)
+
+def classify_name(text: str):
+    """Returns (full_name, reply) for a clean full name, or None if the input is ambiguous."""
+    candidate = NAME_PREFIXES.sub("", text.strip()).strip(" .!")
+    words = candidate.split()
+    if not 2 <= len(words) <= 4 or not is_valid_name(candidate):
+        return None
+    lowered = [word.lower() for word in words]
+    if any(word in NON_NAME_WORDS or word in JOB_TITLE_WORDS for word in lowered):
+        return None
+    # Only common words, or a place name ("New Delhi"): let the LLM decide.
+    if all(word in COMMON_WORDS for word in lowered) or " ".join(lowered) in LOCATION_GAZETTEER:
+        return None
+    full_name = " ".join(word if any(c.isupper() for c in word) else word.capitalize() for word in words)
+    reply = f"Nice to meet you, {words[0].capitalize()}! Could you please share your email address?"
+    return full_name, reply
+
+
+def match_location(text: str):
+    """Returns (location, reply) when every part of the input is a known place, otherwise None."""
+    candidate = LOCATION_PREFIXES.sub("", text.strip()).strip(" .!")
+    parts = [part.strip() for part in candidate.split(",") if part.strip()]
+    if not parts or len(parts) > 3:
+        return None
+    matched = [LOCATION_GAZETTEER.get(part.lower()) for part in parts]
+    if not all(matched):
+        return None
+    location = ", ".join(matched)
+    reply = (f"Thanks! I've noted that you're based in {location}. "
+             "Next, could you list the programming languages, frameworks, and databases you're proficient in?")
+    return location, reply
+
+
+def extract_technologies(text: str) -> list:
+    """
+    Returns the canonical technologies mentioned in the input, or an empty list if any
+    non-filler word cannot be matched to the taxonomy.
+    """
+    technologies, unknown = parse_stack(text.strip().rstrip("."))
+    return [] if unknown else technologies
+
+
+def classify_tech_stack(text: str):
+    """Returns (tech_stack, reply) when the whole input is a recognisable tech list, otherwise None."""
+    technologies = extract_technologies(text)
+    if not technologies:
+        return None
+    tech_stack = ", ".join(technologies)
+    reply = (f"Great, I've noted your tech stack: {tech_stack}. That's all the information I need for now. "
+             "The next step is a brief technical assessment based on your role and tech stack. Are you ready to begin?")
+    return tech_stack, reply
+
+
+# --- ASSESSMENT ANSWER TRIAGE ---
+# Decides locally when an assessment answer clearly needs no follow-up, so the next
+# question can come from the question bank. Anything that might be a vague answer
+# or a clarification request is left to the LLM.
+
+CLARIFICATION_PATTERN = re.compile(
+    r"\b(?:what do you mean|what does that mean|(?:can|could) you (?:explain|clarify|rephrase|repeat)|"
+    r"don'?t understand|not sure what you|as in)\b",
+    re.IGNORECASE,
+)
+
+SKIP_PATTERN = re.compile(r"^\s*(?:no idea|no clue|i (?:do not|don'?t) know|not sure|skip|pass)\b", re.IGNORECASE)
+
+# Answers shorter than this are too easily vague ("yes", "sure, I have") to judge locally.
+MIN_ANSWER_WORDS = 8
+
+ANSWER_TRANSITIONS = [
+    "Thanks for walking me through that.",
+    "Got it, thank you for the explanation.",
+    "Thanks, that's helpful.",
+    "Appreciate the detail there.",
+]
+
+SKIP_TRANSITIONS = [
+    "No problem at all, let's try a different one.",
+    "That's perfectly fine, let's move on.",
+    "No worries, here's another one.",
+]
+
+
+def classify_answer(text: str):
+    """
+    Returns "skipped" for an explicit skip, "answered" for a substantive answer, or None
+    when the answer may be vague or a clarification request and needs the LLM.
+    """
+    if CLARIFICATION_PATTERN.search(text):
+        return None
+    if SKIP_PATTERN.match(text):
+        return "skipped"
+    if "?" in text or len(text.split()) < MIN_ANSWER_WORDS:
+        return None
+    return "answered"
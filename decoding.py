@@ -0,0 +1,263 @@
+import json
+import re
+
+# --- STRUCTURED RESPONSE DECODING ---
+# Every prompt asks for a JSON object of a known shape, but models sometimes wrap it in
+# a markdown fence, add prose around it, run out of tokens mid-object or return a value
+# of the wrong type (a dict where a string was asked for). Responses are parsed
+# tolerantly, repaired where the intent is still clear, and checked against the schema
+# of the prompt kind that produced them, with values coerced to the declared types.
+# Only a response that cannot be repaired raises ResponseDecodeError, whose `problem`
+# is specific enough to put into a targeted re-ask.
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+# How many cut points back from the end a truncated object is tried at.
+MAX_TRUNCATION_CUTS = 8
+
+
+class ResponseDecodeError(ValueError):
+    """An LLM response that could not be parsed or does not match its schema."""
+
+    def __init__(self, problem: str, raw: str = ""):
+        super().__init__(problem)
+        self.problem = problem
+        self.raw = raw
+
+
+# --- TOLERANT PARSING ---
+
+def _scan(text: str):
+    """
+    Walks a (possibly truncated) JSON document. Returns whether it ends inside a string,
+    the stack of open brackets at the end, and (position, stack) for every comma outside
+    a string, which are the points a truncated object can be cut back to.
+    """
+    stack, cuts = [], []
+    in_string = escaped = False
+    for pos, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]" and stack:
+            stack.pop()
+        elif char == ",":
+            cuts.append((pos, list(stack)))
+    return in_string, stack, cuts
+
+
+def _close(text: str, stack: list) -> str:
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def close_truncated(text: str):
+    """
+    Completes a JSON object that was cut off mid-stream by closing its open brackets,
+    dropping the last member if it is incomplete. Returns the parsed value, or None if
+    no completion parses.
+    """
+    in_string, stack, cuts = _scan(text)
+    # A string cut off mid-way (say, half a question) is never completed; its member is dropped.
+    candidates = [] if in_string else [_close(text, stack)]
+    candidates += [_close(text[:pos], cut_stack) for pos, cut_stack in reversed(cuts[-MAX_TRUNCATION_CUTS:])]
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def extract_json(raw: str):
+    """
+    Parses the JSON object in an LLM response. Returns (value, repaired), where
+    `repaired` is True if the response was not valid JSON as sent. Raises
+    ResponseDecodeError if there is no recoverable object.
+    """
+    try:
+        return json.loads(raw), False
+    except json.JSONDecodeError:
+        pass
+    fenced = _FENCE.search(raw)
+    text = fenced.group(1) if fenced else raw
+    start = text.find("{")
+    if start == -1:
+        raise ResponseDecodeError("the reply did not contain a JSON object", raw)
+    try:
+        # raw_decode stops at the end of the object, ignoring any prose after it.
+        return _DECODER.raw_decode(text, start)[0], True
+    except json.JSONDecodeError:
+        pass
+    value = close_truncated(text[start:])
+    if value is None:
+        raise ResponseDecodeError("the reply was not valid JSON", raw)
+    return value, True
+
+
+# --- COERCION ---
+# Each coercer converts a value to the declared type or raises ValueError.
+
+def as_text(value) -> str:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        # Models sometimes nest the text, e.g. {"question": {"description": "..."}}.
+        for key in ("description", "text", "question", "response"):
+            if isinstance(value.get(key), str):
+                return value[key].strip()
+        texts = [item for item in value.values() if isinstance(item, str)]
+        if texts:
+            return texts[0].strip()
+    if isinstance(value, list) and value:
+        return " ".join(as_text(item) for item in value)
+    if value is None or isinstance(value, (dict, list)):
+        raise ValueError("expected a string")
+    return str(value)
+
+def as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "yes", "1", "false", "no", "0"):
+        return value.strip().lower() in ("true", "yes", "1")
+    raise ValueError("expected true or false")
+
+def as_int(value) -> int:
+    if isinstance(value, bool):
+        raise ValueError("expected an integer")
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    raise ValueError("expected an integer")
+
+def as_text_list(value) -> list:
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    if isinstance(value, list):
+        return [as_text(item) for item in value if item is not None]
+    raise ValueError("expected a list of strings")
+
+def as_csv(value) -> str:
+    """A comma-separated string, also accepting a list of strings."""
+    if isinstance(value, list):
+        return ", ".join(item for item in as_text_list(value) if item)
+    return as_text(value)
+
+def as_grades(value) -> list:
+    """A list of {"number", "score", "rationale"} grades; entries that cannot be read are dropped."""
+    if not isinstance(value, list):
+        raise ValueError("expected a list of grades")
+    grades = []
+    for item in value:
+        try:
+            grades.append({"number": as_int(item["number"]), "score": min(5, max(0, as_int(item["score"]))),
+                           "rationale": as_text(item.get("rationale") or "")})
+        except (KeyError, TypeError, ValueError):
+            continue
+    return grades
+
+def as_choice(*choices):
+    def coerce(value) -> str:
+        normalized = as_text(value).lower().replace(" ", "_").replace("-", "_")
+        if normalized not in choices:
+            raise ValueError(f"expected one of {', '.join(choices)}")
+        return normalized
+    return coerce
+
+
+# --- SCHEMAS ---
+# Per prompt kind: {key: (coercer, required)}. Optional keys that are absent or of an
+# unusable type are simply left out; callers keep using `.get` with their defaults.
+
+_GATHERING = {"is_valid": (as_bool, False), "response": (as_text, True)}
+_RESPONSE = {"response": (as_text, True)}
+_QUESTION = {"question": (as_text, True)}
+_ASSESSMENT = {
+    "action_needed": (as_choice("move_on", "elaboration_required", "clarification_provided"), True),
+    "full_response": (as_text, True),
+    "new_question_asked": (as_text, True),
+}
+
+RESPONSE_SCHEMAS = {
+    "name": {"is_valid": (as_bool, True), "response": (as_text, True)},
+    "email": _GATHERING,
+    "phone": _GATHERING,
+    "experience": _GATHERING,
+    "position": {"role_count": (as_int, True), "roles": (as_text_list, False), "response": (as_text, True)},
+    "position_choice": {"role_chosen": (as_text, True), "response": (as_text, True)},
+    "location": _RESPONSE,
+    "tech_stack": _RESPONSE,
+    "profile": {
+        **{key: (as_text, False) for key in (
+            "full_name", "email", "phone_number", "experience_years", "desired_position", "current_location")},
+        "tech_stack": (as_csv, False),
+    },
+    "first_question": _QUESTION,
+    "question_set": {"questions": (as_text_list, True)},
+    "assessment": _ASSESSMENT,
+    "progression": _ASSESSMENT,
+    "coding_question": _QUESTION,
+    "conclusion": _RESPONSE,
+    "interview_summary": {key: (as_text, True) for key in (
+        "overall_summary", "technical_strengths", "areas_for_improvement", "final_recommendation")},
+    "transcript_notes": {"notes": (as_text, True)},
+    "grading": {"grades": (as_grades, True)},
+}
+
+
+def schema_keys(kind: str) -> list:
+    return list(RESPONSE_SCHEMAS.get(kind, {}))
+
+
+def apply_schema(data, kind: str) -> dict:
+    """Coerces `data` to the schema of `kind`; raises ResponseDecodeError naming the bad keys."""
+    if not isinstance(data, dict):
+        raise ResponseDecodeError("the reply was not a JSON object")
+    schema = RESPONSE_SCHEMAS.get(kind)
+    if schema is None:
+        return data
+    result, problems = dict(data), []
+    for key, (coerce, required) in schema.items():
+        if data.get(key) is None:
+            result.pop(key, None)
+            if required:
+                problems.append(f'"{key}" is missing')
+            continue
+        try:
+            result[key] = coerce(data[key])
+        except ValueError as e:
+            result.pop(key)
+            if required:
+                problems.append(f'"{key}" is invalid ({e})')
+    if problems:
+        raise ResponseDecodeError("; ".join(problems))
+    return result
+
+
+def decode_response(raw: str, kind: str = None):
+    """
+    Parses, repairs and validates one LLM response for a prompt of `kind`. Returns
+    (data, repaired); raises ResponseDecodeError if it is unusable.
+    """
+    data, repaired = extract_json(raw)
+    try:
+        return apply_schema(data, kind), repaired
+    except ResponseDecodeError as e:
+        e.raw = raw
+        raise
@@ -0,0 +1,702 @@
+import copy
+import json
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+
+from prompts import (
+    get_name_gathering_prompt, get_email_gathering_prompt, get_phone_gathering_prompt,
+    get_experience_gathering_prompt, get_position_gathering_prompt,
+    get_location_gathering_prompt, get_tech_stack_gathering_prompt, get_profile_extraction_prompt,
+    get_first_question_prompt, get_assessment_response_prompt, get_progression_prompt, get_coding_question_prompt,
+    get_conclusion_prompt, get_json_retry_prompt, prompt_kind
+)
+from decoding import ResponseDecodeError, decode_response, schema_keys
+from routing import escalated, is_low_confidence
+from similarity import QuestionIndex
+from taxonomy import plan_topics
+from utils import is_valid_email, is_valid_phone, is_valid_experience, FIELD_VALIDATORS
+from classifiers import (
+    classify_name, match_location, classify_tech_stack, classify_answer,
+    ANSWER_TRANSITIONS, SKIP_TRANSITIONS
+)
+from history import ChatHistory
+from prefetch import Prefetcher
+from metrics import (
+    TURN_SECONDS, STAGE_SECONDS, JSON_PARSE_SECONDS, JSON_PARSE_ERRORS, JSON_REPAIRS, LLM_ESCALATIONS, QUESTION_REPEATS, TRACES,
+    current_session, current_stage, timed
+)
+
+# --- HEADLESS INTERVIEW ENGINE ---
+# The interview state machine, independent of any UI. `InterviewEngine.step` takes the
+# current state and the candidate's input and returns the new state plus the assistant
+# replies for that turn. LLM access is injected as a callable, so the same engine drives
+# the Streamlit page, API servers and load tests with a stubbed model.
+
+INITIAL_GREETING = "Hello! I'm the AI Hiring Assistant from TalentScout. To start, could you please tell me your full name?"
+
+# "stepwise" gathers the profile one field per turn; "profile" takes a free-form
+# introduction or pasted résumé and extracts every field from it in one call.
+INTAKE_MODE = os.environ.get("INTAKE_MODE", "stepwise")
+PROFILE_GREETING = ("Hello! I'm the AI Hiring Assistant from TalentScout. To start, tell me about yourself, or paste your résumé: "
+                    "your full name, email, phone number, years of experience, the position you're applying for, "
+                    "where you're located and your tech stack.")
+
+# "live" has every assessment turn react to the answer on the large model; "deferred" only
+# moves the interview on (on the fast model) and leaves evaluation to grading.py, which
+# grades the recorded answers after the interview ends.
+GRADING_MODE = os.environ.get("GRADING_MODE", "live")
+
+# Topic recorded for answers to the closing logic questions.
+CODING_TOPIC = "Logic"
+
+# Profile fields in the order they are asked for, with how a follow-up names them.
+PROFILE_FIELDS = {
+    "full_name": "full name",
+    "email": "email address",
+    "phone_number": "10-digit phone number",
+    "experience_years": "years of professional experience",
+    "desired_position": "desired position",
+    "current_location": "current location",
+    "tech_stack": "tech stack (languages, frameworks, databases and tools)",
+}
+
+QUESTIONS_PER_TOPIC = 2
+CODING_QUESTIONS = 2
+
+# How long a live turn will wait for an in-flight prefetch before issuing its own call.
+PREFETCH_WAIT_SECONDS = 20.0
+
+
+def new_candidate_info() -> dict:
+    return { "full_name": None, "email": None, "phone_number": None, "experience_years": None, "desired_position": None, "current_location": None, "tech_stack": None }
+
+
+@dataclass(slots=True)
+class InterviewState:
+    """Everything that describes one interview in progress."""
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    messages: ChatHistory = field(default_factory=ChatHistory)
+    conversation_stage: str = "greeting"
+    candidate_info: dict = field(default_factory=new_candidate_info)
+    awaiting_position_choice: bool = False
+    question_plan: list = field(default_factory=list)
+    current_topic_index: int = 0
+    questions_asked_on_topic: int = 0
+    coding_questions_asked: int = 0
+    last_question_asked: str = ""
+    question_history: list = field(default_factory=list)
+    # Every assessment and logic answer as {"topic", "question", "answer"}, for grading.
+    answers: list = field(default_factory=list)
+    # The last answer drew an elaboration follow-up, so the next one extends its entry.
+    elaborating: bool = False
+
+    def say(self, content: str):
+        """Appends an assistant message to the transcript."""
+        self.messages.append({"role": "assistant", "content": content})
+
+    def to_record(self) -> dict:
+        """Everything except the transcript, as plain JSON-serializable values."""
+        return {name: getattr(self, name) for name in STATE_FIELDS}
+
+    @classmethod
+    def from_record(cls, record: dict, messages: list):
+        """Rebuilds a state from `to_record()` output and its transcript."""
+        history = ChatHistory()
+        for message in messages:
+            history.append(message)
+        return cls(messages=history, **{name: record[name] for name in STATE_FIELDS if name in record})
+
+
+STATE_FIELDS = [name for name in InterviewState.__dataclass_fields__ if name != "messages"]
+
+
+def decode_json(raw: str, kind: str = None) -> dict:
+    """Decodes an LLM response against the schema for `kind`, timed and with failures counted per stage."""
+    stage = current_stage.get()
+    with timed(JSON_PARSE_SECONDS, stage=stage):
+        try:
+            data, repaired = decode_response(raw, kind)
+        except ResponseDecodeError as e:
+            JSON_PARSE_ERRORS.inc(stage=stage)
+            TRACES.record("json_parse_error", kind=kind, chars=len(raw), problem=e.problem)
+            raise
+    if repaired:
+        JSON_REPAIRS.inc(kind=kind, outcome="repaired")
+        TRACES.record("json_repaired", kind=kind)
+    return data
+
+
+class InterviewEngine:
+    """
+    Drives interviews through their stages. `llm(prompt, stream_field=None)` returns the
+    raw JSON response string, or None if the call failed; `stream_field` names the
+    candidate-facing field a streaming frontend may render early. An optional (shareable)
+    Prefetcher enables speculative generation; its keys are namespaced per session.
+    """
+
+    def __init__(self, llm, prefetcher: Prefetcher = None, question_bank=None, intake_mode: str = INTAKE_MODE,
+                 grading_mode: str = GRADING_MODE):
+        self.llm = llm
+        self.prefetcher = prefetcher
+        self.question_bank = question_bank
+        self.intake_mode = intake_mode
+        self.grading_mode = grading_mode
+        self.handlers = {
+            "gathering_profile": self.handle_profile,
+            "gathering_name": self.handle_name,
+            "gathering_email": self.handle_email,
+            "gathering_phone": self.handle_phone,
+            "gathering_experience": self.handle_experience,
+            "gathering_position": self.handle_position,
+            "gathering_location": self.handle_location,
+            "gathering_tech_stack": self.handle_tech_stack,
+            "assessment_start": self.handle_assessment_start,
+            "in_assessment": self.handle_in_assessment,
+            "coding_challenge": self.handle_coding_challenge,
+        }
+
+    def new_state(self) -> InterviewState:
+        """Starts a fresh interview with the opening greeting."""
+        state = InterviewState()
+        state.say(PROFILE_GREETING if self.intake_mode == "profile" else INITIAL_GREETING)
+        return state
+
+    def reset(self, state: InterviewState):
+        """Drops any background work for an interview that is being abandoned."""
+        self.forget(state.session_id)
+
+    def release(self, session_id: str):
+        """Drops the background work held for a session (once it finishes or leaves a persistent store's memory); its trace is kept."""
+        if self.prefetcher:
+            self.prefetcher.clear(session_id)
+
+    def evicted_listener(self, store):
+        """What to call for sessions `store` evicts: a persistent store's sessions can resume, so they keep their trace."""
+        return self.release if store.persistent else self.forget
+
+    def forget(self, session_id: str):
+        """Drops everything held for a session that is gone (reset, or evicted from a non-persistent store), trace included."""
+        self.release(session_id)
+        TRACES.discard(session_id)
+
+    def step(self, state: InterviewState, user_input: str):
+        """
+        Processes one candidate turn. Returns (new_state, replies) where replies are the
+        assistant messages produced by this turn; the input state is left untouched.
+        """
+        state = copy.deepcopy(state)
+        # First user interaction moves the stage from 'greeting' to 'gathering'
+        if state.conversation_stage == "greeting":
+            state.conversation_stage = "gathering_profile" if self.intake_mode == "profile" else "gathering_name"
+
+        state.messages.append({"role": "user", "content": user_input})
+        first_reply = len(state.messages)
+
+        stage = state.conversation_stage
+        session_token, stage_token = current_session.set(state.session_id), current_stage.set(stage)
+        try:
+            with timed(TURN_SECONDS, "turn", stage=stage):
+                handler = self.handlers.get(stage)
+                if handler:
+                    with timed(STAGE_SECONDS, "stage_handler", stage=stage):
+                        handler(state, user_input)
+                if state.conversation_stage == "conclusion":
+                    current_stage.set("conclusion")
+                    with timed(STAGE_SECONDS, "stage_handler", stage="conclusion"):
+                        self.handle_conclusion(state)
+                if state.conversation_stage == "finished":
+                    self.release(state.session_id)
+        finally:
+            current_session.reset(session_token)
+            current_stage.reset(stage_token)
+
+        replies = [message["content"] for message in state.messages[first_reply:] if message["role"] == "assistant"]
+        return state, replies
+
+    def decode(self, raw: str, prompt, kind: str = None) -> dict:
+        """
+        Decodes the response to `prompt` (or to a function building it, when the response
+        was prefetched). A response that cannot be repaired gets one re-ask that says what
+        was wrong with it, on the fallback model if a smaller one produced it; if that fails
+        too, ResponseDecodeError is raised. A valid but unsure reply from a smaller model is
+        asked again on the fallback model, keeping the first reply if that one fails.
+        """
+        kind = kind or prompt_kind(prompt)
+        try:
+            data = decode_json(raw, kind)
+        except ResponseDecodeError as e:
+            prompt = prompt() if callable(prompt) else prompt
+            retry_prompt = get_json_retry_prompt(prompt, raw, e.problem, schema_keys(kind))
+            upgraded = escalated(retry_prompt)
+            if upgraded is not None:
+                LLM_ESCALATIONS.inc(kind=kind, reason="invalid")
+                retry_prompt = upgraded
+            retried = self.llm(retry_prompt)
+            try:
+                data = decode_json(retried, kind) if retried else None
+            except ResponseDecodeError:
+                data = None
+            if data is None:
+                JSON_REPAIRS.inc(kind=kind, outcome="retry_failed")
+                raise
+            JSON_REPAIRS.inc(kind=kind, outcome="retried")
+            return data
+        if not is_low_confidence(kind, data):
+            return data
+        upgraded = escalated(prompt() if callable(prompt) else prompt)
+        if upgraded is None:
+            return data
+        LLM_ESCALATIONS.inc(kind=kind, reason="low_confidence")
+        TRACES.record("llm_escalation", kind=kind)
+        retried = self.llm(upgraded)
+        try:
+            return decode_json(retried, kind) if retried else data
+        except ResponseDecodeError:
+            return data
+
+    def avoid_repeat(self, state: InterviewState, data: dict, raw: str, prompt, field: str, kind: str) -> dict:
+        """
+        Checks the new question in `data[field]` against the questions already asked in
+        this interview, locally. A near-duplicate gets one re-ask naming the repeated
+        question; the original reply is kept if the re-ask fails or repeats as well.
+        """
+        asked = QuestionIndex.from_questions(state.question_history)
+        repeated = asked.find_duplicate(data.get(field))
+        if repeated is None:
+            return data
+        prompt = prompt() if callable(prompt) else prompt
+        problem = f'the new question repeats one already asked ("{repeated}"); ask about a different aspect of the topic'
+        retried = self.llm(get_json_retry_prompt(prompt, raw, problem, schema_keys(kind)))
+        try:
+            fresh = decode_json(retried, kind) if retried else None
+        except ResponseDecodeError:
+            fresh = None
+        if fresh is None or fresh.get(field) in asked:
+            QUESTION_REPEATS.inc(kind=kind, outcome="kept")
+            return data
+        QUESTION_REPEATS.inc(kind=kind, outcome="regenerated")
+        return fresh
+
+    # --- GATHERING STAGES ---
+
+    def handle_name(self, state: InterviewState, user_input: str):
+        name_match = classify_name(user_input)
+        if name_match:
+            full_name, reply = name_match
+            state.candidate_info["full_name"] = full_name
+            state.say(reply)
+            state.conversation_stage = "gathering_email"
+            return
+        prompt = get_name_gathering_prompt(user_input, state.messages)
+        llm_json_response_str = self.llm(prompt, stream_field="response")
+        if llm_json_response_str:
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+                response_text, is_valid = data.get("response"), data.get("is_valid", False)
+                state.say(response_text)
+                if is_valid:
+                    state.candidate_info["full_name"] = user_input
+                    state.conversation_stage = "gathering_email"
+            except ResponseDecodeError:
+                state.say("I had a little hiccup. Could you please repeat your name?")
+
+    def _reask(self, state: InterviewState, prompt, hiccup: str):
+        """Lets the LLM explain why the input was not accepted, without changing stage."""
+        llm_json_response_str = self.llm(prompt, stream_field="response")
+        if llm_json_response_str:
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+                state.say(data.get("response"))
+            except ResponseDecodeError:
+                state.say(hiccup)
+
+    def handle_email(self, state: InterviewState, user_input: str):
+        if not is_valid_email(user_input):
+            self._reask(state, get_email_gathering_prompt(user_input, state.messages),
+                        "I had a little hiccup. Could you provide your email again?")
+            return
+        state.candidate_info["email"] = user_input
+        state.say("Thank you. Your email is recorded. Now, could you please provide your 10-digit phone number?")
+        state.conversation_stage = "gathering_phone"
+
+    def handle_phone(self, state: InterviewState, user_input: str):
+        if not is_valid_phone(user_input):
+            self._reask(state, get_phone_gathering_prompt(user_input, state.messages),
+                        "I had a little hiccup. Could you provide your phone number again?")
+            return
+        state.candidate_info["phone_number"] = user_input
+        state.say("Thanks. How many years of professional experience do you have?")
+        state.conversation_stage = "gathering_experience"
+
+    def handle_experience(self, state: InterviewState, user_input: str):
+        if not is_valid_experience(user_input):
+            self._reask(state, get_experience_gathering_prompt(user_input, state.messages),
+                        "I had a little hiccup. Could you provide your experience again?")
+            return
+        state.candidate_info["experience_years"] = user_input
+        state.say(f"Great, {user_input} years. Which position(s) are you interested in?")
+        state.conversation_stage = "gathering_position"
+
+    def handle_position(self, state: InterviewState, user_input: str):
+        prompt = get_position_gathering_prompt(user_input, state.messages, state.awaiting_position_choice)
+        llm_json_response_str = self.llm(prompt, stream_field="response")
+        if llm_json_response_str:
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+                state.say(data.get("response"))
+                if state.awaiting_position_choice:
+                    state.candidate_info["desired_position"] = data.get("role_chosen")
+                    state.awaiting_position_choice = False
+                    state.conversation_stage = "gathering_location"
+                else:
+                    if data.get("role_count", 0) > 1:
+                        state.awaiting_position_choice = True
+                    elif data.get("role_count", 0) == 1:
+                        state.candidate_info["desired_position"] = (data.get("roles") or [user_input])[0]
+                        state.conversation_stage = "gathering_location"
+            except ResponseDecodeError:
+                state.say("I had a little hiccup. Could you clarify your desired position?")
+
+    def handle_location(self, state: InterviewState, user_input: str):
+        location_match = match_location(user_input)
+        if location_match:
+            location, reply = location_match
+            state.candidate_info["current_location"] = location
+            state.say(reply)
+            state.conversation_stage = "gathering_tech_stack"
+            return
+        prompt = get_location_gathering_prompt(user_input, state.messages)
+        llm_json_response_str = self.llm(prompt, stream_field="response")
+        if llm_json_response_str:
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+                state.candidate_info["current_location"] = user_input
+                state.say(data.get("response"))
+                state.conversation_stage = "gathering_tech_stack"
+            except ResponseDecodeError:
+                state.say("I had a little hiccup. Could you repeat your location?")
+
+    def handle_tech_stack(self, state: InterviewState, user_input: str):
+        tech_match = classify_tech_stack(user_input)
+        if tech_match:
+            tech_stack, reply = tech_match
+            state.candidate_info["tech_stack"] = tech_stack
+            state.say(reply)
+        else:
+            prompt = get_tech_stack_gathering_prompt(user_input, state.messages)
+            llm_json_response_str = self.llm(prompt, stream_field="response")
+            if not llm_json_response_str:
+                return
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+            except ResponseDecodeError:
+                state.say("I had a little hiccup. Could you list your tech stack again?")
+                return
+            state.candidate_info["tech_stack"] = user_input
+            state.say(data.get("response"))
+        state.conversation_stage = "assessment_start"
+        self.plan_assessment(state)
+        self.prefetch_upcoming_questions(state)
+
+    def handle_profile(self, state: InterviewState, user_input: str):
+        """
+        Fills the whole profile from a free-form introduction or résumé with one extraction
+        call. Extracted values are checked with the local validators, and only the fields
+        still missing or invalid are asked for, all in one follow-up.
+        """
+        info = state.candidate_info
+        missing = [key for key in PROFILE_FIELDS if not info[key]]
+        rejected = {}
+        validator = FIELD_VALIDATORS.get(missing[0]) if len(missing) == 1 else None
+        if validator and validator(user_input.strip()) is None:
+            # A follow-up supplying the one remaining validated field needs no extraction call.
+            info[missing[0]] = user_input.strip()
+        else:
+            prompt = get_profile_extraction_prompt(user_input, info, missing)
+            llm_json_response_str = self.llm(prompt)
+            if not llm_json_response_str:
+                return
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+            except ResponseDecodeError:
+                state.say("I had a little hiccup. Could you share those details again?")
+                return
+            for key in missing:
+                value = data.get(key)
+                if not value:
+                    continue
+                problem = FIELD_VALIDATORS[key](value) if key in FIELD_VALIDATORS else None
+                if problem:
+                    rejected[key] = f'"{value}" {problem}'
+                else:
+                    info[key] = value
+
+        missing = [key for key in PROFILE_FIELDS if not info[key]]
+        greeting = f"Thanks, {info['full_name'].split()[0]}." if info["full_name"] else "Thanks."
+        if missing:
+            asks = [f"{PROFILE_FIELDS[key]} ({rejected[key]})" if key in rejected else PROFILE_FIELDS[key] for key in missing]
+            listed = asks[0] if len(asks) == 1 else ", ".join(asks[:-1]) + " and " + asks[-1]
+            state.say(f"{greeting} I still need your {listed}.")
+            return
+        state.say(f"{greeting} I have everything I need for your profile. The next step is a brief technical assessment "
+                  f"based on the {info['desired_position']} role and your tech stack. Are you ready to begin?")
+        state.conversation_stage = "assessment_start"
+        self.plan_assessment(state)
+        self.prefetch_upcoming_questions(state)
+
+    # --- ASSESSMENT PLANNING, PREFETCH & QUESTION BANK ---
+
+    def plan_assessment(self, state: InterviewState):
+        """
+        Builds the topic plan: a bounded, role-weighted pick of the candidate's stack (see
+        taxonomy.py), shuffled so interviews for the same stack do not always run in one order.
+        """
+        candidate_info = state.candidate_info
+        plan = plan_topics(candidate_info["tech_stack"], candidate_info["desired_position"], candidate_info["experience_years"])
+        random.shuffle(plan)
+        state.question_plan = plan or [candidate_info["tech_stack"]]
+        state.current_topic_index = 0
+        state.questions_asked_on_topic = 0
+
+    def prefetch_upcoming_questions(self, state: InterviewState):
+        """
+        Speculatively generates both coding questions and, when the next answer will end
+        the current topic, the next topic's opener; none of them depend on that answer.
+        Openers are only generated when the bank has nothing for the topic.
+        """
+        if not self.prefetcher:
+            return
+        candidate_info = state.candidate_info
+        plan = state.question_plan
+        prompts = {(state.session_id, "coding_question", n): get_coding_question_prompt(candidate_info, n)
+                   for n in range(CODING_QUESTIONS)}
+        # Before the first question the upcoming topic is the current one; afterwards it is the next.
+        if state.conversation_stage == "assessment_start":
+            next_index = state.current_topic_index
+        elif state.questions_asked_on_topic + 1 >= QUESTIONS_PER_TOPIC:
+            next_index = state.current_topic_index + 1
+        else:
+            next_index = len(plan)
+        if next_index < len(plan) and not self.has_banked_questions(state, plan[next_index]):
+            prompts[(state.session_id, "first_question", plan[next_index])] = get_first_question_prompt(candidate_info, plan[next_index])
+        self.prefetcher.prefetch(prompts)
+
+    def take_prefetched(self, state: InterviewState, kind: str, arg, timeout: float = PREFETCH_WAIT_SECONDS):
+        if not self.prefetcher:
+            return None
+        return self.prefetcher.take((state.session_id, kind, arg), timeout=timeout)
+
+    def take_opener(self, state: InterviewState, topic: str, timeout: float = PREFETCH_WAIT_SECONDS):
+        """
+        The prefetched opener for `topic`, or None if there is none, it does not decode or it
+        repeats an earlier question. There is no re-ask: callers have another question to fall back on.
+        """
+        opener_str = self.take_prefetched(state, "first_question", topic, timeout=timeout)
+        try:
+            opener = decode_json(opener_str, "first_question")["question"] if opener_str else None
+        except ResponseDecodeError:
+            return None
+        if opener and opener in QuestionIndex.from_questions(state.question_history):
+            QUESTION_REPEATS.inc(kind="first_question", outcome="dropped")
+            return None
+        return opener or None
+
+    def has_banked_questions(self, state: InterviewState, topic: str) -> bool:
+        if self.question_bank is None:
+            return False
+        candidate_info = state.candidate_info
+        return self.question_bank.has_questions(topic, candidate_info["desired_position"], candidate_info["experience_years"])
+
+    def draw_banked_question(self, state: InterviewState, topic: str):
+        """Draws an unseen pre-generated question for the topic, or None if the bank has none."""
+        if self.question_bank is None:
+            return None
+        candidate_info = state.candidate_info
+        return self.question_bank.draw(topic, candidate_info["desired_position"], candidate_info["experience_years"],
+                                       exclude=state.question_history)
+
+    def local_assessment_response(self, state: InterviewState, user_answer: str):
+        """
+        Handles an assessment turn without the LLM when the answer clearly needs no follow-up
+        and the next question is already at hand: drawn from the bank, or the prefetched
+        opener when this answer ends the topic. Returns a JSON string in the same shape as
+        the assessment prompt's response, or None to defer to the LLM.
+        """
+        answer_type = classify_answer(user_answer)
+        if answer_type is None:
+            return None
+        plan = state.question_plan
+        advances = state.questions_asked_on_topic + 1 >= QUESTIONS_PER_TOPIC
+        next_index = state.current_topic_index + (1 if advances else 0)
+        question = ""
+        if next_index < len(plan):
+            question = self.draw_banked_question(state, plan[next_index])
+            if question is None and advances:
+                question = self.take_opener(state, plan[next_index])
+            if question is None:
+                return None
+        transition = random.choice(SKIP_TRANSITIONS if answer_type == "skipped" else ANSWER_TRANSITIONS)
+        return json.dumps({"action_needed": "move_on", "full_response": f"{transition} {question}".strip(), "new_question_asked": question})
+
+    # --- ASSESSMENT STAGES ---
+
+    def handle_assessment_start(self, state: InterviewState, user_input: str):
+        if not state.question_plan:
+            self.plan_assessment(state)
+
+        first_topic = state.question_plan[0]
+        banked_question = self.draw_banked_question(state, first_topic)
+        if banked_question:
+            llm_json_response_str = json.dumps({"question": banked_question})
+        else:
+            llm_json_response_str = self.take_prefetched(state, "first_question", first_topic)
+        prompt = lambda: get_first_question_prompt(state.candidate_info, first_topic)
+        if not llm_json_response_str:
+            llm_json_response_str = self.llm(prompt())
+        if llm_json_response_str:
+            try:
+                # The schema coerces a nested question object to its text.
+                data = self.decode(llm_json_response_str, prompt, kind="first_question")
+                question_str = self.avoid_repeat(state, data, llm_json_response_str, prompt, "question", "first_question")["question"]
+
+                state.last_question_asked = question_str
+                state.question_history.append(question_str)
+                state.say(question_str)
+                state.conversation_stage = "in_assessment"
+                self.prefetch_upcoming_questions(state)
+            except ResponseDecodeError:
+                state.say("I'm having a moment of writer's block. Let's try that again. Are you ready?")
+
+    def handle_in_assessment(self, state: InterviewState, user_input: str):
+        current_topic = state.question_plan[state.current_topic_index]
+        build_prompt = get_progression_prompt if self.grading_mode == "deferred" else get_assessment_response_prompt
+        kind = "progression" if self.grading_mode == "deferred" else "assessment"
+        prompt = lambda: build_prompt(
+            candidate_info=state.candidate_info,
+            topic=current_topic,
+            questions_asked_on_this_topic=state.questions_asked_on_topic,
+            last_question=state.last_question_asked,
+            user_answer=user_input,
+            question_history=state.question_history
+        )
+        llm_json_response_str = self.local_assessment_response(state, user_input)
+        local = llm_json_response_str is not None
+        if not local:
+            llm_json_response_str = self.llm(prompt(), stream_field="full_response")
+        if not llm_json_response_str:
+            return
+
+        try:
+            # A locally built reply is well-formed by construction; only model replies go through
+            # re-asks and escalation (its empty question after the last answer is not a sign of doubt).
+            data = decode_json(llm_json_response_str, kind) if local else self.decode(llm_json_response_str, prompt, kind=kind)
+            if data.get("action_needed") == "move_on" and data.get("new_question_asked"):
+                # Only new questions are checked; a clarification rephrases the last one on purpose.
+                data = self.avoid_repeat(state, data, llm_json_response_str, prompt, "new_question_asked", kind)
+            action = data.get("action_needed")
+            full_response = data.get("full_response")
+            new_question = data.get("new_question_asked")
+
+            # A clarification request is not an answer; an elaboration completes the one before it.
+            if action != "clarification_provided":
+                self.record_answer(state, current_topic, user_input)
+                state.elaborating = action == "elaboration_required"
+
+            if action == "move_on" and state.questions_asked_on_topic + 1 >= QUESTIONS_PER_TOPIC \
+                    and state.current_topic_index + 1 < len(state.question_plan):
+                # The reply asked another question on the topic that is ending; ask the next topic's opener instead.
+                opener = self.take_opener(state, state.question_plan[state.current_topic_index + 1])
+                if opener and new_question and full_response.endswith(new_question):
+                    full_response = full_response[:-len(new_question)] + opener
+                    new_question = opener
+
+            state.say(full_response)
+            state.last_question_asked = new_question
+
+            if action == "move_on":
+                state.question_history.append(new_question)
+                state.questions_asked_on_topic += 1
+                if state.questions_asked_on_topic >= QUESTIONS_PER_TOPIC:
+                    state.current_topic_index += 1
+                    state.questions_asked_on_topic = 0
+
+            if state.current_topic_index >= len(state.question_plan):
+                self.start_coding_challenge(state)
+            else:
+                self.prefetch_upcoming_questions(state)
+        except ResponseDecodeError:
+            self.skip_topic(state)
+
+    def skip_topic(self, state: InterviewState):
+        """Recovers from an unusable assessment reply by moving to the next topic."""
+        state.say("My apologies, I lost my train of thought. Let's move on.")
+        state.elaborating = False
+        state.current_topic_index += 1
+        state.questions_asked_on_topic = 0
+        if state.current_topic_index >= len(state.question_plan):
+            self.start_coding_challenge(state)
+        else:
+            # If the next topic's opener was prefetched, ask it right away instead of leaving the candidate without a question.
+            # No waiting and no re-ask here: this is already the recovery path.
+            opener = self.take_opener(state, state.question_plan[state.current_topic_index], timeout=0)
+            if opener:
+                state.last_question_asked = opener
+                state.question_history.append(opener)
+                state.say(opener)
+
+    def start_coding_challenge(self, state: InterviewState):
+        state.conversation_stage = "coding_challenge"
+        coding_response_str = self.take_prefetched(state, "coding_question", state.coding_questions_asked)
+        prompt = lambda: get_coding_question_prompt(state.candidate_info, state.coding_questions_asked)
+        if not coding_response_str:
+            coding_response_str = self.llm(prompt())
+        if coding_response_str:
+            try:
+                coding_data = self.decode(coding_response_str, prompt, kind="coding_question")
+            except ResponseDecodeError:
+                state.conversation_stage = "conclusion"
+                return
+            coding_question = coding_data["question"]
+            state.say("Great, thank you. To wrap up, I have a couple of brief logic questions for you.")
+            state.say(coding_question)
+            state.last_question_asked = coding_question
+
+    def record_answer(self, state: InterviewState, topic: str, answer: str):
+        """Records an answer for grading, merging an elaboration into the entry of the answer it extends."""
+        if state.elaborating and state.answers and state.answers[-1]["topic"] == topic:
+            state.answers[-1]["answer"] += f"\n{answer}"
+        else:
+            state.answers.append({"topic": topic, "question": state.last_question_asked, "answer": answer})
+
+    def handle_coding_challenge(self, state: InterviewState, user_input: str):
+        self.record_answer(state, CODING_TOPIC, user_input)
+        state.say("Okay, thank you for that.")
+        state.coding_questions_asked += 1
+
+        if state.coding_questions_asked >= CODING_QUESTIONS:
+            state.conversation_stage = "conclusion"
+            return
+        llm_json_response_str = self.take_prefetched(state, "coding_question", state.coding_questions_asked)
+        prompt = lambda: get_coding_question_prompt(state.candidate_info, state.coding_questions_asked)
+        if not llm_json_response_str:
+            llm_json_response_str = self.llm(prompt())
+        if llm_json_response_str:
+            try:
+                question = self.decode(llm_json_response_str, prompt, kind="coding_question")["question"]
+                state.say(f"For the final question: {question}")
+                state.last_question_asked = question
+            except ResponseDecodeError:
+                state.conversation_stage = "conclusion"
+
+    def handle_conclusion(self, state: InterviewState):
+        prompt = get_conclusion_prompt(state.candidate_info)
+        llm_json_response_str = self.llm(prompt, stream_field="response")
+        if llm_json_response_str:
+            try:
+                data = self.decode(llm_json_response_str, prompt)
+                state.say(data.get("response"))
+                state.conversation_stage = "finished"
+            except ResponseDecodeError:
+                state.say("Thank you for your time. The recruiting team will be in touch.")
@@ -0,0 +1,118 @@
+import argparse
+import json
+import logging
+import os
+
+from batch import BatchCheckpoint, run_batch
+from decoding import decode_response
+from prompts import get_grading_prompt
+from scheduler import PRIORITY_BATCH
+
+# --- DEFERRED ANSWER GRADING ---
+# Grades the recorded answers of completed interviews after the fact, so live turns
+# (with GRADING_MODE=deferred) only have to move the interview on. Each interview is
+# graded in one structured call covering all of its (question, answer) pairs; interviews
+# are graded concurrently on the gateway loop at batch priority, bounded by a semaphore.
+# Per-topic scores are averaged locally from the per-answer grades. As with summaries,
+# this is a resumable batch job (see batch.py).
+
+DEFAULT_GRADES_PATH = "grades.sqlite3"
+GRADING_CONCURRENCY = int(os.environ.get("GRADING_CONCURRENCY", "16"))
+
+MAX_SCORE = 5
+
+
+def mean(values: list):
+    return round(sum(values) / len(values), 2) if values else None
+
+
+def grade_report(answers: list, grades: list) -> dict:
+    """Joins grades to their answers by number and scores each topic and the interview overall."""
+    by_number = {grade["number"]: grade for grade in grades}
+    graded, topics = [], {}
+    for number, item in enumerate(answers, start=1):
+        grade = by_number.get(number)
+        graded.append({**item, "score": grade["score"] if grade else None,
+                       "rationale": grade["rationale"] if grade else None})
+        if grade:
+            topics.setdefault(item["topic"], []).append(grade["score"])
+    return {
+        "overall_score": mean([item["score"] for item in graded if item["score"] is not None]),
+        "max_score": MAX_SCORE,
+        "topic_scores": {topic: {"score": mean(scores), "answers": len(scores)} for topic, scores in topics.items()},
+        "ungraded": sum(item["score"] is None for item in graded),
+        "answers": graded,
+    }
+
+
+class GradeCheckpoint(BatchCheckpoint):
+    """Output database of grade reports; doubles as the record of grading progress."""
+
+    def __init__(self, path: str = DEFAULT_GRADES_PATH):
+        super().__init__(path, "grades", "report", {"overall_score": "REAL"})
+
+    def save(self, session_id: str, report: dict, **columns):
+        super().save(session_id, report, overall_score=report["overall_score"])
+
+
+class Grader:
+    """Grades interviews through the gateway with at most `concurrency` in flight."""
+
+    def __init__(self, gateway, concurrency: int = GRADING_CONCURRENCY):
+        self.gateway = gateway
+        self.concurrency = concurrency
+
+    async def grade(self, answers: list, candidate_info: dict) -> dict:
+        """Returns the grade report for one interview's answers."""
+        if not answers:
+            return grade_report([], [])
+        prompt = get_grading_prompt(answers, candidate_info)
+        grades = decode_response(await self.gateway.acomplete(prompt, priority=PRIORITY_BATCH), prompt.kind)[0]["grades"]
+        return grade_report(answers, grades)
+
+    async def run_batch(self, store, session_ids: list, checkpoint: GradeCheckpoint) -> dict:
+        """Grades every session not yet in the checkpoint; returns counts and throughput."""
+        answers = 0
+
+        async def grade_state(state):
+            nonlocal answers
+            report = await self.grade(state.answers, state.candidate_info)
+            answers += len(state.answers)
+            return report, {}
+
+        counts = await run_batch(store, session_ids, checkpoint, grade_state, self.concurrency,
+                                 done_key="graded", rate_key="interviews_per_minute")
+        counts["answers"] = answers
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade the answers of completed interviews in bulk.")
+    parser.add_argument("--sessions", default=os.environ.get("SESSION_STORE_PATH", "sessions.sqlite3"),
+                        help="SQLite session store to read finished interviews from.")
+    parser.add_argument("--output", default=DEFAULT_GRADES_PATH, help="Grades database (also the resume checkpoint).")
+    parser.add_argument("--concurrency", type=int, default=GRADING_CONCURRENCY)
+    parser.add_argument("--limit", type=int, help="Grade at most this many sessions.")
+    parser.add_argument("--export", help="Also write all grade reports to this JSONL file.")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    from llm import close_gateway, get_gateway
+    from session_store import SQLiteSessionStore
+
+    store = SQLiteSessionStore(args.sessions)
+    checkpoint = GradeCheckpoint(args.output)
+    session_ids = store.session_ids(stage="finished")[:args.limit]
+    gateway = get_gateway()
+    grader = Grader(gateway, concurrency=args.concurrency)
+    result = gateway.run(grader.run_batch(store, session_ids, checkpoint)).result()
+    close_gateway()
+    print(json.dumps(result))
+    if args.export:
+        print(f"Exported {checkpoint.export_jsonl(args.export)} grade reports to {args.export}.")
+
+
+if __name__ == "__main__":
+    main()
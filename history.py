@@ -0,0 +1,89 @@
+from collections import deque
+
+# --- BOUNDED CHAT HISTORY ---
+# Prompt builders used to re-join the whole transcript on every turn, so prompts grew
+# with the length of the interview. ChatHistory renders each message to its prompt line
+# once, keeps the joined string cached, and only carries a sliding window of recent
+# turns plus a compact rolling summary of the turns that fell out of it.
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def render_line(message: dict) -> str:
+    return f"{message['role']}: {message['content']}"
+
+
+class ChatHistory:
+    """
+    A list-like transcript. Iterating yields every message (for display), while
+    `render()` returns the bounded prompt view: a rolling summary of older turns
+    followed by the most recent turns that fit within `max_tokens`.
+    """
+
+    __slots__ = ("max_tokens", "summary_lines", "summary_chars", "messages",
+                 "_window", "_window_tokens", "_summary", "_summarized_count", "_rendered")
+
+    def __init__(self, max_tokens: int = 600, summary_lines: int = 8, summary_chars: int = 100):
+        self.max_tokens = max_tokens
+        self.summary_lines = summary_lines
+        self.summary_chars = summary_chars
+        self.messages = []
+        self._window = deque()
+        self._window_tokens = 0
+        self._summary = deque(maxlen=summary_lines)
+        self._summarized_count = 0
+        self._rendered = None
+
+    def append(self, message: dict):
+        """Adds a message, rendering its prompt line once and evicting old lines past the budget."""
+        self.messages.append(message)
+        line = render_line(message)
+        tokens = estimate_tokens(line)
+        self._window.append((line, tokens))
+        self._window_tokens += tokens
+        # Always keep the newest line, even if it alone exceeds the budget.
+        while self._window_tokens > self.max_tokens and len(self._window) > 1:
+            old_line, old_tokens = self._window.popleft()
+            self._window_tokens -= old_tokens
+            self._summarize(old_line)
+        self._rendered = None
+
+    def _summarize(self, line: str):
+        """Condenses an evicted line into the rolling summary."""
+        if len(line) > self.summary_chars:
+            line = line[:self.summary_chars - 3].rstrip() + "..."
+        if len(self._summary) == self._summary.maxlen:
+            self._summarized_count += 1
+        self._summary.append(line)
+
+    def render(self) -> str:
+        """Returns the cached, bounded history string for prompts."""
+        if self._rendered is None:
+            parts = []
+            if self._summary:
+                parts.append("(Summary of earlier conversation)")
+                if self._summarized_count:
+                    parts.append(f"... {self._summarized_count} earlier messages omitted ...")
+                parts.extend(self._summary)
+                parts.append("(Recent conversation)")
+            parts.extend(line for line, _ in self._window)
+            self._rendered = "\n".join(parts)
+        return self._rendered
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+
+def format_history(chat_history) -> str:
+    """Renders a ChatHistory (bounded, cached) or a plain list of messages for a prompt."""
+    if isinstance(chat_history, ChatHistory):
+        return chat_history.render()
+    return "\n".join(render_line(msg) for msg in chat_history)
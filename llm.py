@@ -0,0 +1,226 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from prompts import to_messages, prompt_kind, is_cacheable
+from routing import profile_for
+from cache import build_cache_from_env
+from scheduler import RequestScheduler, PRIORITY_LIVE, request_key, estimate_request_tokens
+from metrics import LLM_REQUEST_SECONDS, LLM_FIRST_TOKEN_SECONDS, LLM_TOKENS, LLM_ERRORS, TRACES, bind_context
+
+# --- PROCESS-WIDE LLM GATEWAY ---
+# Every Streamlit session (and any other frontend) shares one AsyncGroq client that
+# lives on a single long-lived event loop thread. Connections and TLS sessions in its
+# pool are kept alive and reused across calls and sessions, and callers on ordinary
+# threads submit work through a small sync-friendly API instead of spinning up an
+# event loop per call with asyncio.run. The groq SDK (the slowest import in the app) is
+# only loaded when the gateway is first created.
+
+REQUEST_TIMEOUT = 20.0
+
+# Connection pool sizing for the shared client.
+MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = 60.0
+
+_STREAM_END = object()
+
+
+def record_usage(kind: str, model: str, usage) -> dict:
+    """Counts the prompt and completion tokens from a completion's `usage`, if it has one."""
+    if usage is None:
+        return {}
+    tokens = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+    LLM_TOKENS.inc(usage.prompt_tokens, kind=kind, type="prompt", model=model)
+    LLM_TOKENS.inc(usage.completion_tokens, kind=kind, type="completion", model=model)
+    return tokens
+
+
+def request_params(prompt, model: str = None, temperature: float = None, max_tokens: int = None) -> dict:
+    """The prompt's routed model profile, with any explicitly given parameters taking precedence."""
+    profile = profile_for(prompt)
+    return {
+        "model": model or profile.model,
+        "temperature": profile.temperature if temperature is None else temperature,
+        "max_tokens": max_tokens or profile.max_tokens,
+    }
+
+
+class LLMGateway:
+    """Owns the shared LLM client and the event loop thread it runs on."""
+
+    def __init__(self, api_key: str = None):
+        import httpx
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        # Retries are handled by the scheduler, which knows about budgets and priorities.
+        self.client = AsyncGroq(api_key=api_key or os.environ.get("GROQ_API_KEY"), http_client=http_client, max_retries=0)
+        self.scheduler = RequestScheduler()
+        self.cache = build_cache_from_env()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        """Schedules a coroutine on the gateway loop and returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(bind_context(coro), self.loop)
+
+    async def acomplete(self, prompt, priority: int = PRIORITY_LIVE, model: str = None,
+                        temperature: float = None, max_tokens: int = None) -> str:
+        """
+        Requests a JSON-mode completion through the scheduler and returns the raw content
+        string. Parameters not given come from the prompt's routed model profile.
+        """
+        messages = to_messages(prompt)
+        kind = prompt_kind(prompt)
+        params = request_params(prompt, model, temperature, max_tokens)
+        model = params["model"]
+        cache = self.cache if is_cacheable(prompt) else None
+        if cache:
+            cached = cache.get(kind, messages, params)
+            if cached is not None:
+                TRACES.record("llm", kind=kind, mode="complete", cached=True, seconds=0.0)
+                return cached
+
+        async def send():
+            chat_completion = await self.client.chat.completions.create(
+                messages=messages, response_format={"type": "json_object"}, timeout=REQUEST_TIMEOUT, **params
+            )
+            # Counted here, once per request actually sent, not once per coalesced caller.
+            return chat_completion.choices[0].message.content, record_usage(kind, model, chat_completion.usage)
+
+        started = time.perf_counter()
+        try:
+            content, tokens = await self.scheduler.submit(
+                send, request_key(messages, params), model, estimate_request_tokens(messages, params["max_tokens"]), priority
+            )
+        except Exception as e:
+            LLM_ERRORS.inc(kind=kind, mode="complete")
+            TRACES.record("llm_error", kind=kind, mode="complete", error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        LLM_REQUEST_SECONDS.observe(elapsed, kind=kind, mode="complete")
+        TRACES.record("llm", kind=kind, mode="complete", model=model, priority=priority, seconds=round(elapsed, 6), **tokens)
+        if cache:
+            cache.put(kind, messages, params, content)
+        return content
+
+    def submit(self, prompt, **params):
+        """Starts a completion in the background; the returned future resolves to the raw content."""
+        return self.run(self.acomplete(prompt, **params))
+
+    def complete(self, prompt, **params) -> str:
+        """Blocks the calling thread until the completion is available."""
+        return self.submit(prompt, **params).result()
+
+    async def _pump_stream(self, prompt, sink: queue.Queue, params: dict):
+        messages = to_messages(prompt)
+        kind = prompt_kind(prompt)
+        model = params["model"]
+        started = time.perf_counter()
+        first_token = None
+        tokens = {}
+
+        async def open_stream():
+            # Groq's JSON mode does not support streaming, so we rely on the prompt's JSON instructions.
+            return await self.client.chat.completions.create(
+                messages=messages, stream=True, timeout=REQUEST_TIMEOUT, **params
+            )
+
+        try:
+            # Only opening the stream is scheduled (and retried); streams are never coalesced.
+            stream = await self.scheduler.submit(
+                open_stream, None, model, estimate_request_tokens(messages, params["max_tokens"]), PRIORITY_LIVE, coalesce=False
+            )
+            chunks = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                        LLM_FIRST_TOKEN_SECONDS.observe(first_token, kind=kind)
+                    chunks.append(delta)
+                    sink.put(delta)
+                # Groq reports usage on the final chunk of a stream.
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    tokens = record_usage(kind, model, x_groq.usage)
+            elapsed = time.perf_counter() - started
+            LLM_REQUEST_SECONDS.observe(elapsed, kind=kind, mode="stream")
+            TRACES.record("llm", kind=kind, mode="stream", model=model, seconds=round(elapsed, 6),
+                          first_token_seconds=round(first_token, 6) if first_token is not None else None, **tokens)
+            if self.cache and is_cacheable(prompt):
+                self.cache.put(kind, messages, params, "".join(chunks))
+        except Exception as e:
+            LLM_ERRORS.inc(kind=kind, mode="stream")
+            TRACES.record("llm_error", kind=kind, mode="stream", error=type(e).__name__)
+            sink.put(e)
+        finally:
+            sink.put(_STREAM_END)
+
+    def stream(self, prompt, model: str = None, temperature: float = None, max_tokens: int = None):
+        """Yields content deltas on the calling thread while the request runs on the gateway loop."""
+        params = request_params(prompt, model, temperature, max_tokens)
+        if self.cache and is_cacheable(prompt):
+            cached = self.cache.get(prompt_kind(prompt), to_messages(prompt), params)
+            if cached is not None:
+                TRACES.record("llm", kind=prompt_kind(prompt), mode="stream", cached=True, seconds=0.0)
+                yield cached
+                return
+        sink = queue.Queue()
+        self.run(self._pump_stream(prompt, sink, params))
+        while True:
+            item = sink.get(timeout=REQUEST_TIMEOUT)
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        """Stops the scheduler's workers, closes the client and ends the loop thread."""
+        async def shutdown():
+            await self.scheduler.close()
+            await self.client.close()
+        self.run(shutdown()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def metrics(self) -> dict:
+        """Snapshot of the scheduler's queue, wait-time and retry metrics plus cache counters."""
+        async def snapshot():
+            return self.scheduler.metrics()
+        metrics = self.run(snapshot()).result()
+        metrics["cache"] = self.cache.stats if self.cache else {}
+        return metrics
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway() -> LLMGateway:
+    """Returns the process-wide gateway, creating it on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def close_gateway():
+    """Shuts the process-wide gateway down, if it was created (for scripts that exit cleanly)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None:
+            _gateway.close()
+            _gateway = None
@@ -0,0 +1,262 @@
+import bisect
+import contextvars
+import functools
+import http.server
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# --- METRICS & TRACES ---
+# Hot-path timings and token counts, kept in process. Aggregates are exposed as
+# Prometheus text (`render_prometheus`), and each interview session keeps a bounded
+# trace of its events (stage handlers, prompt builds, LLM calls, JSON parsing, voice
+# decoding) that can be dumped as JSONL. The session and stage a measurement belongs
+# to travel in context variables, so callees do not need them passed in.
+
+METRIC_PREFIX = "talentscout_"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+TRACE_MAX_SESSIONS = int(os.environ.get("TRACE_MAX_SESSIONS", "1000"))
+TRACE_MAX_EVENTS = int(os.environ.get("TRACE_MAX_EVENTS", "500"))
+
+current_session = contextvars.ContextVar("current_session", default=None)
+current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+def _label_key(labelnames: tuple, labels: dict) -> tuple:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape_label(value: str) -> str:
+    """Escapes a label value for the Prometheus text format (backslash, double quote, newline)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, key: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self, **labels) -> float:
+        """Sum over every series whose labels include the given ones."""
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(value for key, value in self._values.items() if all(key[i] == v for i, v in wanted))
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, labelnames, buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * len(self.buckets) + [0, 0.0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, counts in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {counts[-2]}")
+                lines.append(f"{self.name}_count{labels} {counts[-2]}")
+                lines.append(f"{self.name}_sum{labels} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(METRIC_PREFIX + name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(METRIC_PREFIX + name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TURN_SECONDS = REGISTRY.histogram("turn_seconds", "Wall time of one engine turn.", ("stage",))
+STAGE_SECONDS = REGISTRY.histogram("stage_handler_seconds", "Wall time of a stage handler.", ("stage",))
+PROMPT_BUILD_SECONDS = REGISTRY.histogram("prompt_build_seconds", "Time spent in a get_*_prompt builder.", ("kind",))
+JSON_PARSE_SECONDS = REGISTRY.histogram("json_parse_seconds", "Time spent parsing an LLM JSON response.", ("stage",))
+JSON_PARSE_ERRORS = REGISTRY.counter("json_parse_errors_total", "LLM responses that could not be decoded or repaired.", ("stage",))
+JSON_REPAIRS = REGISTRY.counter("json_repairs_total", "LLM responses repaired locally or re-asked, by outcome.", ("kind", "outcome"))
+LLM_REQUEST_SECONDS = REGISTRY.histogram("llm_request_seconds", "LLM call latency including queueing and retries.", ("kind", "mode"))
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram("llm_first_token_seconds", "Time to the first streamed token.", ("kind",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported in completion usage.", ("kind", "type", "model"))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM calls that failed after retries.", ("kind", "mode"))
+LLM_ESCALATIONS = REGISTRY.counter("llm_escalations_total", "Replies asked again on the fallback model.", ("kind", "reason"))
+QUESTION_REPEATS = REGISTRY.counter("question_repeats_total", "Generated questions that nearly repeated an earlier one, by outcome.", ("kind", "outcome"))
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "Retried LLM request attempts.", ("model",))
+LLM_CACHE = REGISTRY.counter("llm_cache_total", "Response cache lookups.", ("kind", "outcome"))
+VOICE_DECODE_SECONDS = REGISTRY.histogram("voice_decode_seconds", "Time to decode a recording to PCM.")
+VOICE_RECOGNIZE_SECONDS = REGISTRY.histogram("voice_recognize_seconds", "Speech recognition time.", ("backend",))
+RENDER_SECONDS = REGISTRY.histogram("ui_render_seconds", "Streamlit script time spent re-rendering the page.")
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# --- PER-SESSION TRACES ---
+
+class TraceRecorder:
+    """
+    Keeps the most recent events of the most recently active sessions. With TRACE_DIR
+    set, every event is also appended to `<TRACE_DIR>/<session_id>.jsonl` as it happens.
+    """
+
+    def __init__(self, max_sessions: int = TRACE_MAX_SESSIONS, max_events: int = TRACE_MAX_EVENTS, trace_dir: str = None):
+        self.max_sessions = max_sessions
+        self.max_events = max_events
+        self.trace_dir = trace_dir
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, event: str, session_id: str = None, **fields):
+        # An explicit session id means the caller runs outside that session's context.
+        stage = current_stage.get() if session_id is None else None
+        session_id = session_id or current_session.get()
+        if session_id is None:
+            return
+        entry = {"ts": round(time.time(), 6), "session_id": session_id, "event": event, **fields}
+        if stage is not None and "stage" not in entry:
+            entry["stage"] = stage
+        with self._lock:
+            events = self._sessions.get(session_id)
+            if events is None:
+                events = self._sessions[session_id] = deque(maxlen=self.max_events)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            events.append(entry)
+        if self.trace_dir:
+            with open(os.path.join(self.trace_dir, f"{session_id}.jsonl"), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def events(self, session_id: str) -> list:
+        with self._lock:
+            return list(self._sessions.get(session_id, ()))
+
+    def dump_jsonl(self, session_id: str) -> str:
+        return "".join(json.dumps(entry) + "\n" for entry in self.events(session_id))
+
+    def discard(self, session_id: str):
+        """Drops a session's in-memory trace (files under TRACE_DIR are kept)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+TRACES = TraceRecorder(trace_dir=os.environ.get("TRACE_DIR") or None)
+
+
+@contextmanager
+def timed(histogram: Histogram, event: str = None, **labels):
+    """Observes the wall time of the block, and records it as a trace event if `event` is given."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, **labels)
+        if event:
+            TRACES.record(event, seconds=round(elapsed, 6), **labels)
+
+
+def timed_prompt(builder):
+    """Decorates a get_*_prompt builder to time it, labelled by the kind of prompt it returns."""
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        prompt = builder(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        kind = getattr(prompt, "kind", "legacy")
+        PROMPT_BUILD_SECONDS.observe(elapsed, kind=kind)
+        TRACES.record("prompt_build", kind=kind, seconds=round(elapsed, 6))
+        return prompt
+    return wrapper
+
+
+def bind_context(coro):
+    """Wraps a coroutine so it runs with the caller's session and stage (e.g. on another loop's thread)."""
+    session_id, stage = current_session.get(), current_stage.get()
+
+    async def bound():
+        current_session.set(session_id)
+        current_stage.set(stage)
+        return await coro
+    return bound()
+
+
+# --- EXPORT ---
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = render_prometheus(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/traces/") and self.path.endswith(".jsonl"):
+            body, content_type = TRACES.dump_jsonl(self.path[len("/traces/"):-len(".jsonl")]), "application/x-ndjson"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serves /metrics and /traces/<session_id>.jsonl from a background thread."""
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+# --- SPECULATIVE PREFETCH ---
+# Questions that do not depend on the candidate's next answer (the opener for the
+# upcoming topic, the two closing coding questions) are generated in the background
+# while the candidate is still typing, so the live turn can use them immediately.
+# Results nobody takes (an abandoned tab, a session that never reaches its coding
+# questions) expire after PREFETCH_TTL_SECONDS.
+
+PREFETCH_TTL_SECONDS = float(os.environ.get("PREFETCH_TTL_SECONDS", "1800"))
+
+class Prefetcher:
+    """
+    Starts speculative LLM calls and caches the raw responses per key. `submit` takes
+    a prompt and returns a concurrent.futures.Future resolving to the raw JSON string.
+    One instance may be shared by many sessions when keys are tuples led by a session id.
+    """
+
+    def __init__(self, submit, ttl: float = PREFETCH_TTL_SECONDS):
+        self._submit = submit
+        self.ttl = ttl
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, prompts: dict):
+        """Schedules every {key: prompt} that is not already cached or in flight."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            for key, prompt in prompts.items():
+                if key not in self._futures:
+                    self._futures[key] = (self._submit(prompt), now)
+
+    def _expire(self, now: float):
+        # Entries are kept in insertion order, so the oldest are at the front.
+        while self._futures:
+            key, (future, created) = next(iter(self._futures.items()))
+            if now - created <= self.ttl:
+                break
+            del self._futures[key]
+            future.cancel()
+
+    def take(self, key, timeout: float = None):
+        """
+        Removes and returns the prefetched response for `key`, waiting up to `timeout`
+        seconds if it is still in flight. Returns None on a miss or failure.
+        """
+        with self._lock:
+            entry = self._futures.pop(key, None)
+        if entry is None:
+            return None
+        future = entry[0]
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def clear(self, session_id=None):
+        """
+        Drops cached or in-flight results (e.g. when an interview restarts, ends or is
+        evicted): those of one session if `session_id` is given, otherwise everything.
+        """
+        with self._lock:
+            keys = [key for key in self._futures if session_id is None or key[0] == session_id]
+            for key in keys:
+                self._futures.pop(key)[0].cancel()
@@ -1,11 +1,66 @@
 # prompts.py
+from typing import NamedTuple
+from history import format_history
+from metrics import timed_prompt
+from similarity import coverage_summary
 
-def get_name_gathering_prompt(user_input: str, chat_history: list):
-    """
-    Generates a structured prompt for the LLM to handle name gathering.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+# --- PROMPT TEMPLATES ---
+# Every prompt is split into a static system block (persona, rules and the JSON
+# contract) and a volatile user block (candidate data, history, latest response).
+# The static blocks are compiled once at import time and sent first as their own
+# system message, so consecutive requests of the same kind share a long
+# byte-identical prefix that the provider's prompt cache can reuse.
+
+class Prompt(NamedTuple):
+    """A rendered prompt: its template kind plus the chat messages to send."""
+    kind: str
+    messages: list
+    # Pins the prompt to a model profile instead of the one routed for its kind (see routing.py).
+    profile: str = None
+    # Whether its response may be served from / stored in the response cache (see cache.py).
+    cacheable: bool = True
+
+
+class PromptTemplate:
+    """A compiled prompt with a precomputed static system message and a volatile user template."""
+
+    def __init__(self, kind: str, system: str, user: str):
+        self.kind = kind
+        self.system_message = {"role": "system", "content": system.strip()}
+        self.user = user.strip()
+
+    def render(self, **fields) -> Prompt:
+        return Prompt(self.kind, [self.system_message, {"role": "user", "content": self.user.format(**fields)}])
+
+
+def to_messages(prompt) -> list:
+    """Accepts a rendered Prompt or a raw prompt string and returns chat messages."""
+    if isinstance(prompt, Prompt):
+        return prompt.messages
+    return [{"role": "user", "content": prompt}]
+
+
+def prompt_kind(prompt):
+    """Returns the template kind of a rendered Prompt, or None for a raw prompt string."""
+    return prompt.kind if isinstance(prompt, Prompt) else None
+
+
+def is_cacheable(prompt) -> bool:
+    return prompt.cacheable if isinstance(prompt, Prompt) else True
+
+
+GATHERING_USER = """
+**Chat History:**
+{history_str}
+
+**Candidate's Latest Response:** "{user_input}"
+
+Based on the rules and the candidate's latest response, generate the JSON object.
+
+**JSON Response:**
+"""
+
+NAME_TEMPLATE = PromptTemplate("name", """
 You are an AI Hiring Assistant for a company called TalentScout.
 Your current task is to get the candidate's full name.
 
@@ -18,24 +73,9 @@ Your current task is to get the candidate's full name.
 6.  Your response MUST be a JSON object with two keys:
     - "is_valid": boolean, true if the user's last message was a valid full name, otherwise false.
     - "response": string, your natural language response to the user.
+""", GATHERING_USER)
 
-**Chat History:**
-{history_str}
-
-**Candidate's Latest Response:** "{user_input}"
-
-Based on the rules and the candidate's latest response, generate the JSON object.
-
-**JSON Response:**
-"""
-    return prompt
-
-def get_email_gathering_prompt(user_input: str, chat_history: list):
-    """
-    Generates a structured prompt for the LLM to handle email gathering.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+EMAIL_TEMPLATE = PromptTemplate("email", """
 You are an AI Hiring Assistant for TalentScout.
 Your current task is to get the candidate's email address.
 
@@ -48,24 +88,9 @@ Your current task is to get the candidate's email address.
 6.  Your response MUST be a JSON object with two keys:
     - "is_valid": boolean, true if the user's last message was a valid email, otherwise false.
     - "response": string, your natural language response to the user.
+""", GATHERING_USER)
 
-**Chat History:**
-{history_str}
-
-**Candidate's Latest Response:** "{user_input}"
-
-Based on the rules and the candidate's latest response, generate the JSON object.
-
-**JSON Response:**
-"""
-    return prompt
-
-def get_phone_gathering_prompt(user_input: str, chat_history: list):
-    """
-    Generates a structured prompt for the LLM to handle phone number gathering.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+PHONE_TEMPLATE = PromptTemplate("phone", """
 You are an AI Hiring Assistant for TalentScout.
 Your current task is to get the candidate's 10-digit phone number.
 
@@ -78,24 +103,9 @@ Your current task is to get the candidate's 10-digit phone number.
 6.  Your response MUST be a JSON object with two keys:
     - "is_valid": boolean, true if the user's last message was a valid phone number, otherwise false.
     - "response": string, your natural language response to the user.
+""", GATHERING_USER)
 
-**Chat History:**
-{history_str}
-
-**Candidate's Latest Response:** "{user_input}"
-
-Based on the rules and the candidate's latest response, generate the JSON object.
-
-**JSON Response:**
-"""
-    return prompt
-
-def get_experience_gathering_prompt(user_input: str, chat_history: list):
-    """
-    Generates a structured prompt for the LLM to handle experience gathering.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+EXPERIENCE_TEMPLATE = PromptTemplate("experience", """
 You are an AI Hiring Assistant for TalentScout.
 Your current task is to get the candidate's years of professional experience as a number.
 
@@ -107,35 +117,21 @@ Your current task is to get the candidate's years of professional experience as
 5.  Your response MUST be a JSON object with two keys:
     - "is_valid": boolean, true if the user's last message was a valid number of years, otherwise false.
     - "response": string, your natural language response to the user.
+""", GATHERING_USER)
 
+POSITION_USER = """
 **Chat History:**
 {history_str}
 
 **Candidate's Latest Response:** "{user_input}"
 
-Based on the rules and the candidate's latest response, generate the JSON object.
+Based on the instructions, the chat history, and the candidate's latest response, generate the JSON object.
 
 **JSON Response:**
 """
-    return prompt
 
-def get_position_gathering_prompt(user_input: str, chat_history: list, needs_clarification: bool):
-    """
-    Generates a prompt for the LLM to handle gathering desired positions.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    
-    if needs_clarification:
-        instruction = """
-Your task is to analyze the candidate's response, which is their choice of a single role from a list they provided earlier.
-1.  Identify the single, clarified role from their response.
-2.  Confirm this choice and then ask for their current location.
-3.  Your response MUST be a JSON object with two keys:
-    - "role_chosen": string, the single role the user has chosen (e.g., "Software Engineer").
-    - "response": string, your natural language response to the user.
-"""
-    else:
-        instruction = """
+POSITION_TEMPLATE = PromptTemplate("position", """
+You are an AI Hiring Assistant for TalentScout.
 Your task is to analyze the candidate's response to "Which position(s) are you interested in?".
 1.  Identify the job titles mentioned. Count them.
 2.  If exactly ONE position is mentioned, confirm it and ask for their current location.
@@ -144,41 +140,34 @@ Your task is to analyze the candidate's response to "Which position(s) are you i
     - "role_count": integer, the number of distinct roles you identified.
     - "roles": list of strings, the roles you identified.
     - "response": string, your natural language response to the user.
-"""
+""", POSITION_USER)
 
-    prompt = f"""
+POSITION_CHOICE_TEMPLATE = PromptTemplate("position_choice", """
 You are an AI Hiring Assistant for TalentScout.
-{instruction}
+Your task is to analyze the candidate's response, which is their choice of a single role from a list they provided earlier.
+1.  Identify the single, clarified role from their response.
+2.  Confirm this choice and then ask for their current location.
+3.  Your response MUST be a JSON object with two keys:
+    - "role_chosen": string, the single role the user has chosen (e.g., "Software Engineer").
+    - "response": string, your natural language response to the user.
+""", POSITION_USER)
 
+SHORT_GATHERING_USER = """
 **Chat History:**
 {history_str}
-
 **Candidate's Latest Response:** "{user_input}"
-
-Based on the instructions, the chat history, and the candidate's latest response, generate the JSON object.
-
 **JSON Response:**
 """
-    return prompt
 
-def get_location_gathering_prompt(user_input: str, chat_history: list):
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+LOCATION_TEMPLATE = PromptTemplate("location", """
 You are an AI Hiring Assistant. Your task is to acknowledge the user's location and then ask them to list their tech stack.
 **Rules:**
 1.  Acknowledge their location. Any location text is valid.
 2.  Ask them to list the programming languages, frameworks, and databases they are proficient in.
 3.  Your response MUST be a JSON object with one key: "response": string, your natural language response to the user.
-**Chat History:**
-{history_str}
-**Candidate's Latest Response:** "{user_input}"
-**JSON Response:**
-"""
-    return prompt
+""", SHORT_GATHERING_USER)
 
-def get_tech_stack_gathering_prompt(user_input: str, chat_history: list):
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
-    prompt = f"""
+TECH_STACK_TEMPLATE = PromptTemplate("tech_stack", """
 You are an AI Hiring Assistant. You have just collected the candidate's tech stack. This is the final piece of information.
 **Rules:**
 1.  Acknowledge the tech stack they provided.
@@ -186,35 +175,51 @@ You are an AI Hiring Assistant. You have just collected the candidate's tech sta
 3.  Inform them that the next step is a brief technical assessment based on the role and tech stack they provided.
 4.  Ask if they are ready to begin the assessment.
 5.  Your response MUST be a JSON object with one key: "response": string, your natural language response to the user.
-**Chat History:**
-{history_str}
-**Candidate's Latest Response:** "{user_input}"
-**JSON Response:**
-"""
-    return prompt
-
-# --- ASSESSMENT PROMPTS ---
+""", SHORT_GATHERING_USER)
 
-# prompts.py
+PROFILE_TEMPLATE = PromptTemplate("profile", """
+You are an AI Hiring Assistant for a company called TalentScout.
+Your task is to extract the candidate's profile from what they wrote about themselves, which may be a short introduction or a pasted résumé.
+**Rules:**
+1.  Only extract what the candidate actually stated. Never guess or invent a value; use null for anything not stated.
+2.  "experience_years" is their total years of professional experience as a whole number, written as a string (e.g., "5").
+3.  "phone_number" is their phone number exactly as written.
+4.  If several positions are mentioned, use the one they say they are applying for; if that is unclear, use the first.
+5.  "tech_stack" is a comma-separated list of the programming languages, frameworks, databases and tools they work with.
+6.  Your response MUST be a JSON object with these keys, each a string or null: "full_name", "email", "phone_number", "experience_years", "desired_position", "current_location", "tech_stack".
+""", """
+**Already Known:** {known_str}
+**Still Needed:** {missing_str}
+**Candidate's Message:**
+---
+{user_input}
+---
+**JSON Response:**
+""")
+
+FIRST_QUESTION_TEMPLATE = PromptTemplate("first_question", """
+You are an expert technical interviewer. Your task is to ask the very first technical question of the interview.
+Formulate an appropriate question for the topic, the candidate's experience and the role given below.
+Your response MUST be a JSON object with one key: "question". The value for "question" MUST be a single string.
+""", """
+The topic is: **{topic}**. The candidate has {experience_years} years of experience and is applying for the **{desired_position}** role.
+**JSON Response:**
+""")
+
+QUESTION_SET_TEMPLATE = PromptTemplate("question_set", """
+You are an expert technical interviewer. Your task is to write a set of distinct technical interview questions for the topic, experience level and role given below.
+Each question must be self-contained, answerable conversationally in a few sentences, and must not ask the candidate to write code.
+Cover different aspects of the topic; do not repeat or closely rephrase a question.
+Your response MUST be a JSON object with one key: "questions". The value for "questions" MUST be a list of strings.
+""", """
+The topic is: **{topic}**. The candidate has {experience_years} years of experience and is applying for the **{desired_position}** role.
+Write {count} questions.
+**JSON Response:**
+""")
 
-def get_assessment_response_prompt(candidate_info: dict, topic: str, questions_asked_on_this_topic: int, last_question: str, user_answer: str, question_history: list):
-    """
-    Evaluates the last answer and asks the next, context-aware question with a refined persona.
-    """
-    history_str = "\n".join(question_history)
-    prompt = f"""
+ASSESSMENT_TEMPLATE = PromptTemplate("assessment", """
 You are a senior technical recruiter at TalentScout. Your tone is professional, encouraging, and curious. Your goal is to understand the candidate's thought process.
 
-**Candidate Profile:**
-- Desired Role: {candidate_info.get('desired_position', 'N/A')}
-- Experience: {candidate_info.get('experience_years', 'N/A')} years
-
-**Interview Context:**
-- The Current Topic: **{topic}**
-- This will be question #{questions_asked_on_this_topic + 1} about this topic.
-- The Previous Question You Asked: "{last_question}"
-- The Candidate's Answer To It: "{user_answer}"
-
 **Your Task & Critical Rules:**
 1.  **Analyze the Candidate's Response Type:**
     - If the candidate asks for clarification on YOUR question (e.g., "what do you mean?", "authorization as in?"), you MUST rephrase or explain your original question. Do NOT move on to a new topic. The `action_needed` MUST be "clarification_provided".
@@ -222,77 +227,89 @@ You are a senior technical recruiter at TalentScout. Your tone is professional,
     - Otherwise, assume the candidate attempted to answer and the `action_needed` is "move_on".
 2.  **Be Tolerant of Transcription Errors:** The candidate may be using voice-to-text. Focus on the conceptual meaning, not minor spelling errors.
 3.  **Handle Skips Gracefully:** If the candidate struggles or skips ("no idea"), provide an encouraging transition and move to a new question. Do not give negative feedback.
-4.  **Ask Varied Questions:** If asking the second question on a topic, ask a new, distinct question. Broaden the assessment.
+4.  **Ask Varied Questions:** If asking the second question on a topic, ask a new, distinct question. Broaden the assessment. Never repeat or closely rephrase anything listed under "Already Covered".
 5.  **Always Formulate a Response:** Your `full_response` MUST end with a question (either a rephrased one or a new one).
 
 **Your Final Response MUST be a JSON object with three keys:**
 - "action_needed": string, one of ["move_on", "elaboration_required", "clarification_provided"].
 - "full_response": string, your combined response.
 - "new_question_asked": string, only the new question part of your response. If rephrasing, this should be the rephrased question.
+""", """
+**Candidate Profile:**
+- Desired Role: {desired_position}
+- Experience: {experience_years} years
+
+**Interview Context:**
+- The Current Topic: **{topic}**
+- This will be question #{question_number} about this topic.
+- Already Covered: {coverage}
+- The Previous Question You Asked: "{last_question}"
+- The Candidate's Answer To It: "{user_answer}"
 
 **JSON Response:**
-"""
-    return prompt
+""")
 
-def get_coding_question_prompt(candidate_info: dict, questions_asked: int):
-    """
-    Generates a simple coding or logic question for the end of the interview.
-    """
-    prompt = f"""
-You are an expert technical interviewer for TalentScout.
-You are at the end of the interview and will ask a simple logic question. This is question #{questions_asked + 1} of 2.
+PROGRESSION_TEMPLATE = PromptTemplate("progression", """
+You are a technical recruiter at TalentScout running a screening interview. The candidate's answers are graded separately after the interview, so do NOT evaluate or comment on how good the answer was.
 
-**Candidate Profile:**
-- Desired Role: {candidate_info.get('desired_position', 'N/A')}
-- Experience: {candidate_info.get('experience_years', 'N/A')} years
-- Tech Stack: {candidate_info.get('tech_stack', 'N/A')}
+**Your Task & Critical Rules:**
+1.  If the candidate asks for clarification on YOUR question, rephrase it. The `action_needed` MUST be "clarification_provided".
+2.  If the candidate gives a vague non-answer (e.g., "yes", "sure"), ask them to elaborate. The `action_needed` MUST be "elaboration_required".
+3.  Otherwise the `action_needed` is "move_on": give a short, neutral transition and ask a new, distinct question on the current topic. Never repeat or closely rephrase anything listed under "Already Covered".
+4.  Your `full_response` MUST end with a question.
+
+**Your Final Response MUST be a JSON object with three keys:**
+- "action_needed": string, one of ["move_on", "elaboration_required", "clarification_provided"].
+- "full_response": string, your combined response.
+- "new_question_asked": string, only the question part of your response.
+""", """
+**Candidate:** {desired_position}, {experience_years} years of experience
+**Current Topic:** {topic} (question #{question_number} on it)
+**Already Covered:** {coverage}
+**Your Previous Question:** "{last_question}"
+**The Candidate's Answer:** "{user_answer}"
+
+**JSON Response:**
+""")
+
+CODING_QUESTION_TEMPLATE = PromptTemplate("coding_question", """
+You are an expert technical interviewer for TalentScout.
+You are at the end of the interview and will ask a simple logic question (one of 2).
 
 **Your Instructions:**
 1.  Formulate a simple question that can be answered in a few lines of pseudocode or text.
 2.  **CRITICAL RULE: Do NOT ask the candidate to "Write the code".** Instead, phrase it as "Describe the logic..." or "How would you structure the code to...".
 3.  The question must be simple and relevant. Good examples: "In Python, describe the logic to find the second-largest number in a list?", "How would you structure a SQL query to find all users from 'Pune'?"
 4.  Your response MUST be a JSON object with one key: "question": string, the logic question.
+""", """
+This is question #{question_number} of 2.
+
+**Candidate Profile:**
+- Desired Role: {desired_position}
+- Experience: {experience_years} years
+- Tech Stack: {tech_stack}
 
 **JSON Response:**
-"""
-    return prompt
+""")
 
-def get_conclusion_prompt(candidate_info: dict):
-    """
-    Generates the final closing message for the interview.
-    """
-    prompt = f"""
+CONCLUSION_TEMPLATE = PromptTemplate("conclusion", """
 You are an AI Hiring Assistant for TalentScout. The technical assessment is complete. Your task is to provide a polite and professional closing statement.
-**Candidate Profile:**
-- Name: {candidate_info.get('full_name', 'the candidate')}
 **Your Instructions:**
 1.  Thank the candidate by name for their time.
 2.  Inform them that this concludes the initial automated screening.
 3.  Explain the next steps: The recruitment team will review their responses and will be in touch if their profile is a good match.
 4.  Wish them the best of luck in their job search.
 5.  Your response MUST be a JSON object with one key: "response": string, your closing statement.
+""", """
+**Candidate Profile:**
+- Name: {full_name}
 **JSON Response:**
-"""
-    return prompt
+""")
 
-def get_interview_summary_prompt(full_chat_history: list, candidate_info: dict):
-    """
-    Generates a final summary and evaluation of the entire interview.
-    """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in full_chat_history])
-    prompt = f"""
+INTERVIEW_SUMMARY_TEMPLATE = PromptTemplate("interview_summary", """
 You are a senior hiring manager at TalentScout. You have just observed an automated screening interview with a candidate.
 Your task is to write a concise summary and evaluation based on the entire conversation transcript.
 
-**Candidate's Final Profile:**
-- Name: {candidate_info.get('full_name', 'N/A')}
-- Desired Role: {candidate_info.get('desired_position', 'N/A')}
-- Stated Experience: {candidate_info.get('experience_years', 'N/A')} years
-- Tech Stack: {candidate_info.get('tech_stack', 'N/A')}
-
-**Full Interview Transcript:**
-{history_str}
-
 **Your Instructions:**
 Analyze the transcript and generate a structured summary. Your tone should be professional and objective.
 Your response MUST be a JSON object with the following keys:
@@ -300,7 +317,252 @@ Your response MUST be a JSON object with the following keys:
 - "technical_strengths": A bulleted list (as a single string with '\\n- ') of technical topics where the candidate seemed knowledgeable.
 - "areas_for_improvement": A bulleted list (as a single string with '\\n- ') of topics where the candidate struggled or seemed less confident.
 - "final_recommendation": A one-sentence recommendation. (e.g., "Recommend for a follow-up technical interview.", "Candidate may be better suited for a different role.", "Candidate is not a strong fit at this time.").
+""", """
+**Candidate's Final Profile:**
+- Name: {full_name}
+- Desired Role: {desired_position}
+- Stated Experience: {experience_years} years
+- Tech Stack: {tech_stack}
+
+**Full Interview Transcript:**
+{history_str}
 
 **JSON Response:**
+""")
+
+GRADING_TEMPLATE = PromptTemplate("grading", """
+You are a senior technical interviewer at TalentScout grading the answers from a finished screening interview.
+Grade each numbered answer on how well it answers its question, for the candidate's experience level.
+
+**Scale:** 0 = skipped or no answer, 1 = incorrect, 2 = major gaps, 3 = partially correct, 4 = solid, 5 = excellent and complete.
+
+**Rules:**
+1.  Grade every answer, with one entry per number.
+2.  The candidate may be using voice-to-text. Grade the conceptual meaning, not spelling.
+3.  The rationale is one or two sentences naming what was right or missing.
+4.  Your response MUST be a JSON object with one key: "grades": a list with one object per answer, each with "number": integer, "score": integer from 0 to 5, and "rationale": string.
+""", """
+**Candidate:** {full_name}, applying for {desired_position} with {experience_years} years of experience
+
+**Answers:**
+{answers_str}
+
+**JSON Response:**
+""")
+
+TRANSCRIPT_NOTES_TEMPLATE = PromptTemplate("transcript_notes", """
+You are a senior hiring manager at TalentScout reviewing one part of a long screening interview transcript.
+Your task is to take compact notes on this part only, so that they can later be combined with notes on the other parts into a full evaluation.
+
+**Your Instructions:**
+Record the topics covered, how well the candidate answered each one, and anything notable about their background or communication.
+Your response MUST be a JSON object with one key: "notes": string, your notes as short bullet points separated by '\\n- '.
+""", """
+**Candidate:** {full_name}, applying for {desired_position}
+**Transcript part {part} of {parts}:**
+{history_str}
+
+**JSON Response:**
+""")
+
+# Registry of compiled templates, keyed by prompt kind.
+PROMPT_TEMPLATES = {template.kind: template for template in (
+    NAME_TEMPLATE, EMAIL_TEMPLATE, PHONE_TEMPLATE, EXPERIENCE_TEMPLATE, POSITION_TEMPLATE,
+    POSITION_CHOICE_TEMPLATE, LOCATION_TEMPLATE, TECH_STACK_TEMPLATE, PROFILE_TEMPLATE, FIRST_QUESTION_TEMPLATE,
+    QUESTION_SET_TEMPLATE, ASSESSMENT_TEMPLATE, PROGRESSION_TEMPLATE, CODING_QUESTION_TEMPLATE, CONCLUSION_TEMPLATE,
+    INTERVIEW_SUMMARY_TEMPLATE, GRADING_TEMPLATE, TRANSCRIPT_NOTES_TEMPLATE,
+)}
+
+JSON_RETRY_USER = """
+Your previous reply could not be used: {problem}.
+Reply again with only the JSON object, with these keys: {keys}. Do not wrap it in a code block or add any other text.
 """
-    return prompt
\ No newline at end of file
+
+# --- GATHERING PROMPTS ---
+
+@timed_prompt
+def get_name_gathering_prompt(user_input: str, chat_history: list):
+    """
+    Generates a structured prompt for the LLM to handle name gathering.
+    """
+    return NAME_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_email_gathering_prompt(user_input: str, chat_history: list):
+    """
+    Generates a structured prompt for the LLM to handle email gathering.
+    """
+    return EMAIL_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_phone_gathering_prompt(user_input: str, chat_history: list):
+    """
+    Generates a structured prompt for the LLM to handle phone number gathering.
+    """
+    return PHONE_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_experience_gathering_prompt(user_input: str, chat_history: list):
+    """
+    Generates a structured prompt for the LLM to handle experience gathering.
+    """
+    return EXPERIENCE_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_position_gathering_prompt(user_input: str, chat_history: list, needs_clarification: bool):
+    """
+    Generates a prompt for the LLM to handle gathering desired positions.
+    """
+    template = POSITION_CHOICE_TEMPLATE if needs_clarification else POSITION_TEMPLATE
+    return template.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_location_gathering_prompt(user_input: str, chat_history: list):
+    return LOCATION_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_tech_stack_gathering_prompt(user_input: str, chat_history: list):
+    return TECH_STACK_TEMPLATE.render(history_str=format_history(chat_history), user_input=user_input)
+
+@timed_prompt
+def get_profile_extraction_prompt(user_input: str, candidate_info: dict, missing: list):
+    """
+    Extracts every profile field from a free-form introduction or résumé in one call.
+    """
+    known = {key: value for key, value in candidate_info.items() if value}
+    return PROFILE_TEMPLATE.render(
+        known_str=", ".join(f"{key}: {value}" for key, value in known.items()) or "nothing yet",
+        missing_str=", ".join(missing),
+        user_input=user_input,
+    )
+
+# --- ASSESSMENT PROMPTS ---
+
+@timed_prompt
+def get_first_question_prompt(candidate_info: dict, topic: str):
+    """
+    Asks for the opening technical question on the first topic of the plan.
+    """
+    return FIRST_QUESTION_TEMPLATE.render(
+        topic=topic,
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+    )
+
+@timed_prompt
+def get_question_set_prompt(topic: str, desired_position: str, experience_years: int, count: int):
+    """
+    Asks for a batch of distinct questions on one topic, used to pre-generate the question bank.
+    """
+    return QUESTION_SET_TEMPLATE.render(
+        topic=topic, desired_position=desired_position, experience_years=experience_years, count=count
+    )
+
+@timed_prompt
+def get_assessment_response_prompt(candidate_info: dict, topic: str, questions_asked_on_this_topic: int, last_question: str, user_answer: str, question_history: list):
+    """
+    Evaluates the last answer and asks the next, context-aware question with a refined persona.
+    Earlier questions are sent as a bounded keyword digest, not in full.
+    """
+    return ASSESSMENT_TEMPLATE.render(
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        topic=topic,
+        question_number=questions_asked_on_this_topic + 1,
+        last_question=last_question,
+        user_answer=user_answer,
+        coverage=coverage_summary(question_history),
+    )
+
+@timed_prompt
+def get_progression_prompt(candidate_info: dict, topic: str, questions_asked_on_this_topic: int, last_question: str, user_answer: str, question_history: list):
+    """
+    Moves the assessment on without evaluating the answer, for interviews graded after they end.
+    """
+    return PROGRESSION_TEMPLATE.render(
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        topic=topic,
+        question_number=questions_asked_on_this_topic + 1,
+        coverage=coverage_summary(question_history),
+        last_question=last_question,
+        user_answer=user_answer,
+    )
+
+@timed_prompt
+def get_coding_question_prompt(candidate_info: dict, questions_asked: int):
+    """
+    Generates a simple coding or logic question for the end of the interview.
+    """
+    return CODING_QUESTION_TEMPLATE.render(
+        question_number=questions_asked + 1,
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        tech_stack=candidate_info.get('tech_stack', 'N/A'),
+    )
+
+@timed_prompt
+def get_conclusion_prompt(candidate_info: dict):
+    """
+    Generates the final closing message for the interview.
+    """
+    return CONCLUSION_TEMPLATE.render(full_name=candidate_info.get('full_name', 'the candidate'))
+
+@timed_prompt
+def get_interview_summary_prompt(full_chat_history: list, candidate_info: dict):
+    """
+    Generates a final summary and evaluation of the entire interview.
+    """
+    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in full_chat_history])
+    return INTERVIEW_SUMMARY_TEMPLATE.render(
+        full_name=candidate_info.get('full_name', 'N/A'),
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        tech_stack=candidate_info.get('tech_stack', 'N/A'),
+        history_str=history_str,
+    )
+
+@timed_prompt
+def get_grading_prompt(answers: list, candidate_info: dict):
+    """
+    Grades every recorded (topic, question, answer) of a finished interview in one call.
+    """
+    answers_str = "\n".join(
+        f"{number}. [{item['topic']}] Q: {item['question']}\n   A: {item['answer']}"
+        for number, item in enumerate(answers, start=1)
+    )
+    return GRADING_TEMPLATE.render(
+        full_name=candidate_info.get('full_name', 'N/A'),
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        experience_years=candidate_info.get('experience_years', 'N/A'),
+        answers_str=answers_str,
+    )
+
+@timed_prompt
+def get_transcript_notes_prompt(chunk: list, candidate_info: dict, part: int, parts: int):
+    """
+    Generates notes on one part of a transcript too long to summarize in one prompt.
+    """
+    return TRANSCRIPT_NOTES_TEMPLATE.render(
+        full_name=candidate_info.get('full_name', 'N/A'),
+        desired_position=candidate_info.get('desired_position', 'N/A'),
+        part=part,
+        parts=parts,
+        history_str="\n".join([f"{msg['role']}: {msg['content']}" for msg in chunk]),
+    )
+
+# --- RESPONSE REPAIR ---
+
+@timed_prompt
+def get_json_retry_prompt(prompt, raw_response: str, problem: str, keys: list):
+    """
+    Re-asks for a reply that could not be repaired. The original messages are resent
+    unchanged (keeping their cached prefix), followed by the bad reply and what was wrong with it.
+    """
+    keys_str = ", ".join(f'"{key}"' for key in keys) or "the keys requested above"
+    messages = to_messages(prompt) + [
+        {"role": "assistant", "content": raw_response},
+        {"role": "user", "content": JSON_RETRY_USER.strip().format(problem=problem, keys=keys_str)},
+    ]
+    # A re-ask carries one particular bad reply, so its response is never worth caching.
+    return Prompt(prompt_kind(prompt), messages, getattr(prompt, "profile", None), cacheable=False)
@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+import sqlite3
+import threading
+
+from similarity import QuestionIndex
+
+# --- PRE-GENERATED QUESTION BANK ---
+# Question sets are generated offline per (technology, role, experience band) and stored
+# in SQLite. At runtime the whole index is loaded into memory once, so drawing an unseen
+# question for a topic is a dictionary lookup instead of an LLM round trip. Each set keeps
+# a near-duplicate index, so rephrasings of a stored question are not added again and a
+# draw never offers a rephrasing of something the candidate was already asked.
+
+DEFAULT_BANK_PATH = "question_bank.sqlite3"
+
+# Experience bands and the representative years used when generating each band.
+EXPERIENCE_BANDS = {"junior": 1, "mid": 4, "senior": 8}
+
+# Generic role used when a bank has no set for the candidate's exact role.
+ANY_ROLE = ""
+
+DEFAULT_TECHNOLOGIES = [
+    "Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Go", "SQL", "Django", "Flask",
+    "Spring Boot", "Node.js", "React", "Angular", "PostgreSQL", "MySQL", "MongoDB", "Redis",
+    "Docker", "Kubernetes", "AWS",
+]
+
+
+def experience_band(experience_years) -> str:
+    """Maps stated years of experience onto a bank band (unknown values count as junior)."""
+    try:
+        years = int(experience_years)
+    except (TypeError, ValueError):
+        return "junior"
+    if years <= 2:
+        return "junior"
+    return "mid" if years <= 5 else "senior"
+
+
+def normalize_key(value) -> str:
+    return " ".join(str(value or "").lower().replace(",", " ").split())
+
+
+class QuestionBank:
+    """SQLite-backed question store with an in-memory index keyed by (technology, role, band)."""
+
+    def __init__(self, path: str = DEFAULT_BANK_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "technology TEXT NOT NULL, role TEXT NOT NULL, band TEXT NOT NULL, question TEXT NOT NULL, "
+            "UNIQUE (technology, role, band, question))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS questions_lookup ON questions (technology, role, band)")
+        self._lock = threading.Lock()
+        self._index = {}
+        self._similar = {}
+        for technology, role, band, question in self._conn.execute("SELECT technology, role, band, question FROM questions"):
+            self._index.setdefault((technology, role, band), []).append(question)
+            self._similar.setdefault((technology, role, band), QuestionIndex()).add(question)
+
+    def add(self, technology: str, role: str, band: str, questions: list) -> int:
+        """Stores new questions for a set and returns how many were added."""
+        key = (normalize_key(technology), normalize_key(role), band)
+        with self._lock:
+            existing = self._index.setdefault(key, [])
+            similar = self._similar.setdefault(key, QuestionIndex())
+            fresh = []
+            for question in questions:
+                question = question.strip() if isinstance(question, str) else ""
+                if question and question not in similar:
+                    similar.add(question)
+                    fresh.append(question)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO questions (technology, role, band, question) VALUES (?, ?, ?, ?)",
+                [(*key, question) for question in fresh],
+            )
+            self._conn.commit()
+            existing.extend(fresh)
+        return len(fresh)
+
+    def draw(self, topic: str, role: str, experience_years, exclude=()):
+        """
+        Returns a random question for the topic that is not in `exclude` (nor a rephrasing
+        of one), preferring the candidate's exact role and falling back to the generic set.
+        None if none are left.
+        """
+        technology, band = normalize_key(topic), experience_band(experience_years)
+        seen = QuestionIndex.from_questions(exclude)
+        for role_key in (normalize_key(role), ANY_ROLE):
+            unseen = [q for q in self._index.get((technology, role_key, band), ()) if q not in seen]
+            if unseen:
+                return random.choice(unseen)
+        return None
+
+    def has_questions(self, topic: str, role: str, experience_years) -> bool:
+        """Whether any set covers the topic for this role or the generic role (a lookup, no draw)."""
+        technology, band = normalize_key(topic), experience_band(experience_years)
+        return any(self._index.get((technology, role_key, band)) for role_key in (normalize_key(role), ANY_ROLE))
+
+    def __len__(self):
+        return sum(len(questions) for questions in self._index.values())
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+def get_question_bank():
+    """Returns the process-wide bank from QUESTION_BANK_PATH, or None if no bank file exists."""
+    global _bank
+    path = os.environ.get("QUESTION_BANK_PATH", DEFAULT_BANK_PATH)
+    if _bank is None and os.path.exists(path):
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank(path)
+    return _bank
+
+
+# --- OFFLINE BATCH GENERATION ---
+
+def build_bank(bank: QuestionBank, technologies: list, roles: list, bands: list, count: int):
+    """Generates a question set for every (technology, role, band) combination at batch priority."""
+    from decoding import decode_response
+    from llm import get_gateway
+    from prompts import get_question_set_prompt
+    from scheduler import PRIORITY_BATCH
+
+    gateway = get_gateway()
+    jobs = {}
+    for technology in technologies:
+        for role in roles:
+            for band in bands:
+                prompt = get_question_set_prompt(technology, role or "software engineering", EXPERIENCE_BANDS[band], count)
+                jobs[(technology, role, band)] = gateway.submit(prompt, priority=PRIORITY_BATCH)
+
+    added = 0
+    for (technology, role, band), future in jobs.items():
+        try:
+            questions = decode_response(future.result(), "question_set")[0]["questions"]
+        except Exception as e:
+            print(f"Skipping {technology} / {role or 'any role'} / {band}: {e}")
+            continue
+        added += bank.add(technology, role, band, questions)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate the technical question bank.")
+    parser.add_argument("--path", default=os.environ.get("QUESTION_BANK_PATH", DEFAULT_BANK_PATH))
+    parser.add_argument("--technologies", nargs="+", default=DEFAULT_TECHNOLOGIES)
+    parser.add_argument("--roles", nargs="+", default=[ANY_ROLE], help="Roles to specialise sets for (default: generic).")
+    parser.add_argument("--bands", nargs="+", default=list(EXPERIENCE_BANDS), choices=list(EXPERIENCE_BANDS))
+    parser.add_argument("--count", type=int, default=10, help="Questions to request per set.")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    bank = QuestionBank(args.path)
+    added = build_bank(bank, args.technologies, args.roles, args.bands, args.count)
+    print(f"Added {added} questions; {len(bank)} questions in {args.path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import os
+from typing import NamedTuple
+
+from prompts import Prompt, is_cacheable, prompt_kind, to_messages
+
+# --- MODEL ROUTING ---
+# Maps each prompt kind to a model profile (model, temperature, max_tokens). Gathering
+# stages only validate or extract a field from a short reply, which a small fast model
+# does at a fraction of the latency and cost; the large model is kept for the technical
+# assessment, question generation and summaries. A reply from a cheaper profile that
+# fails its schema or looks unsure is asked again once on the fallback profile. With
+# deferred grading, assessment turns only move the interview on ("progression"), which
+# the fast model handles too.
+#
+# Deployments can override both tables with JSON, e.g.
+#   LLM_MODEL_PROFILES='{"fast": {"model": "llama-3.1-8b-instant", "max_tokens": 250}}'
+#   LLM_ROUTES='{"name": "fast", "position": "large"}'   (replaces the default routes; '{}' sends everything to the default profile)
+
+class ModelProfile(NamedTuple):
+    model: str
+    temperature: float
+    max_tokens: int
+
+
+DEFAULT_PROFILES = {
+    "large": ModelProfile("llama-3.3-70b-versatile", 0.8, 500),
+    "fast": ModelProfile("llama-3.1-8b-instant", 0.3, 300),
+}
+
+FAST_KINDS = ("name", "email", "phone", "experience", "position", "position_choice", "location", "tech_stack", "profile",
+              "progression", "conclusion")
+DEFAULT_ROUTES = {kind: "fast" for kind in FAST_KINDS}
+
+
+def load_profiles(overrides: dict) -> dict:
+    """Applies per-field overrides to the default profiles; new names define new profiles."""
+    profiles = dict(DEFAULT_PROFILES)
+    for name, fields in overrides.items():
+        base = profiles.get(name, DEFAULT_PROFILES["large"])
+        profiles[name] = base._replace(**fields)
+    return profiles
+
+
+PROFILES = load_profiles(json.loads(os.environ.get("LLM_MODEL_PROFILES", "{}")))
+ROUTES = json.loads(os.environ["LLM_ROUTES"]) if os.environ.get("LLM_ROUTES") else DEFAULT_ROUTES
+DEFAULT_PROFILE = os.environ.get("LLM_DEFAULT_PROFILE", "large")
+FALLBACK_PROFILE = os.environ.get("LLM_FALLBACK_PROFILE", "large")
+
+
+def route(prompt) -> str:
+    """Name of the profile a prompt is sent with: its pinned profile, else its kind's route."""
+    return getattr(prompt, "profile", None) or ROUTES.get(prompt_kind(prompt), DEFAULT_PROFILE)
+
+
+def profile_for(prompt) -> ModelProfile:
+    return PROFILES[route(prompt)]
+
+
+def escalated(prompt):
+    """The same prompt pinned to the fallback profile, or None if it already uses that model."""
+    if profile_for(prompt).model == PROFILES[FALLBACK_PROFILE].model:
+        return None
+    return Prompt(prompt_kind(prompt), to_messages(prompt), FALLBACK_PROFILE, is_cacheable(prompt))
+
+
+def is_low_confidence(kind: str, data: dict) -> bool:
+    """Signs in a decoded (schema-valid) reply that the model was unsure or inconsistent."""
+    if kind == "position":
+        roles = data.get("roles")
+        return data["role_count"] > 0 and roles is not None and len(roles) != data["role_count"]
+    # An empty candidate-facing text or extracted value.
+    return any(isinstance(value, str) and not value for value in data.values())
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import deque
+from metrics import LLM_RETRIES, TRACES, current_session
+
+# --- LLM REQUEST SCHEDULER ---
+# Sits in front of the shared Groq client on the gateway loop. Requests are queued by
+# priority (live candidate turns first), dispatched by a fixed pool of workers only when
+# the model's request/token budget allows, retried with exponential backoff and jitter
+# on 429/5xx/connection errors, and identical in-flight prompts share a single call.
+
+PRIORITY_LIVE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {PRIORITY_LIVE: "live", PRIORITY_PREFETCH: "prefetch", PRIORITY_BATCH: "batch"}
+
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Optional per-model budgets, e.g. {"llama-3.3-70b-versatile": {"rpm": 1000, "tpm": 300000}}.
+# Models without an entry are not throttled locally.
+MODEL_BUDGETS = json.loads(os.environ.get("LLM_MODEL_BUDGETS", "{}"))
+
+# Number of recent queue waits kept for percentile reporting.
+WAIT_SAMPLE_SIZE = 1000
+
+
+def request_key(messages: list, params: dict) -> str:
+    """Hashes the exact messages and model parameters of a request for coalescing."""
+    payload = json.dumps([messages, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_request_tokens(messages: list, max_tokens: int) -> int:
+    """Budget estimate: ~4 characters per prompt token plus the completion allowance."""
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+
+def is_retryable(error: Exception) -> bool:
+    # Imported here so importing the scheduler (e.g. for its priorities) does not load the SDK.
+    from groq import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Honours Retry-After when the server sends it, otherwise backs off exponentially with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0.5, 1.0) * min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+
+
+class TokenBucket:
+    """A continuously refilling budget of `per_minute` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.available >= amount else (amount - self.available) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+
+class ModelBudget:
+    """Requests-per-minute and tokens-per-minute buckets for one model."""
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def wait_time(self, tokens: int) -> float:
+        waits = [0.0]
+        if self.requests:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(waits)
+
+    def consume(self, tokens: int):
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(tokens)
+
+
+class _Job:
+    __slots__ = ("key", "factory", "model", "tokens", "priority", "future", "enqueued", "started", "session_id")
+
+    def __init__(self, key, factory, model, tokens, priority, future):
+        self.key = key
+        self.factory = factory
+        self.model = model
+        self.tokens = tokens
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.started = False
+        # Workers run outside the submitter's context, so retries are traced against this.
+        self.session_id = current_session.get()
+
+
+class RequestScheduler:
+    """
+    Priority queue, budgets, retries and coalescing for LLM calls. Must be used from
+    a single event loop (the gateway loop); workers start lazily on first submit.
+    """
+
+    def __init__(self, concurrency: int = MAX_CONCURRENCY, budgets: dict = None, max_retries: int = MAX_RETRIES):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.budgets = {model: ModelBudget(**limits) for model, limits in (budgets or MODEL_BUDGETS).items()}
+        self._queue = None
+        self._seq = 0
+        self._inflight = {}
+        self._workers = []
+        self._queued_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+        self._waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "retries": 0, "coalesced": 0, "throttled_seconds": 0.0}
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def _enqueue(self, job: _Job, priority: int):
+        self._seq += 1
+        self._queued_by_priority[priority] += 1
+        self._queue.put_nowait((priority, self._seq, job))
+
+    async def submit(self, factory, key: str, model: str, tokens: int, priority: int = PRIORITY_LIVE, coalesce: bool = True):
+        """
+        Queues `factory` (a zero-argument coroutine function performing the request) and
+        returns its result. Requests with the same `key` already in flight are coalesced.
+        """
+        self._ensure_workers()
+        self.stats["submitted"] += 1
+        job = self._inflight.get(key) if coalesce else None
+        if job is not None:
+            self.stats["coalesced"] += 1
+            # A live caller joining a queued background job pulls it forward.
+            if priority < job.priority and not job.started:
+                job.priority = priority
+                self._enqueue(job, priority)
+            return await asyncio.shield(job.future)
+
+        job = _Job(key, factory, model, tokens, priority, asyncio.get_running_loop().create_future())
+        if coalesce:
+            self._inflight[key] = job
+            job.future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self._enqueue(job, priority)
+        return await asyncio.shield(job.future)
+
+    async def _worker(self):
+        while True:
+            priority, _, job = await self._queue.get()
+            self._queued_by_priority[priority] -= 1
+            # Promoted jobs are queued twice; whichever copy is dequeued first runs.
+            if job.started or job.future.done():
+                continue
+            job.started = True
+            self._waits.append(time.monotonic() - job.enqueued)
+            await self._run(job)
+
+    async def _run(self, job: _Job):
+        budget = self.budgets.get(job.model)
+        for attempt in range(self.max_retries + 1):
+            if budget:
+                wait = budget.wait_time(job.tokens)
+                while wait > 0:
+                    self.stats["throttled_seconds"] += wait
+                    await asyncio.sleep(wait)
+                    wait = budget.wait_time(job.tokens)
+                budget.consume(job.tokens)
+            try:
+                result = await job.factory()
+            except Exception as e:
+                if attempt < self.max_retries and is_retryable(e):
+                    self.stats["retries"] += 1
+                    LLM_RETRIES.inc(model=job.model)
+                    TRACES.record("llm_retry", session_id=job.session_id, model=job.model, attempt=attempt + 1, error=type(e).__name__)
+                    await asyncio.sleep(retry_delay(e, attempt))
+                    continue
+                self.stats["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+            self.stats["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+            return
+
+    async def close(self):
+        """Cancels the workers and any jobs still queued; workers restart if the scheduler is used again."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait()[2].future.cancel()
+        self._workers, self._queue = [], None
+        self._queued_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def metrics(self) -> dict:
+        """Queue depth per priority, queue-wait percentiles (seconds) and request counters."""
+        waits = sorted(self._waits)
+
+        def percentile(p):
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "queue_depth": {PRIORITY_NAMES[p]: count for p, count in self._queued_by_priority.items()},
+            "inflight": len(self._inflight),
+            "wait_seconds": {"p50": percentile(0.50), "p95": percentile(0.95), "max": waits[-1] if waits else 0.0},
+            **self.stats,
+        }
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.web
+import tornado.websocket
+from dotenv import load_dotenv
+
+from engine import InterviewEngine
+from llm import get_gateway
+from prefetch import Prefetcher
+from question_bank import get_question_bank
+from scheduler import PRIORITY_PREFETCH
+from session_store import build_session_store_from_env
+from streaming import JSONFieldStreamer
+from metrics import TRACES, render_prometheus
+
+# --- INTERVIEW API SERVER ---
+# Serves the same interview flow as the Streamlit app over REST and WebSocket, without
+# re-running a script per turn. Sessions live in a pluggable store, turns for one session
+# are serialized, and engine steps run on a worker pool (their LLM calls wait on the
+# shared gateway loop), so one process can hold hundreds of concurrent interviews.
+#
+#   POST   /sessions                 -> {"session_id", "stage", "replies"}
+#   GET    /sessions/<id>            -> {"session_id", "stage", "candidate_info", "messages"}
+#   POST   /sessions/<id>/turns      {"input": "..."} -> {"session_id", "stage", "replies"}
+#   DELETE /sessions/<id>
+#   GET    /sessions/<id>/trace      -> the session's trace events as JSONL
+#   GET    /stats                    -> session store footprint and LLM gateway metrics
+#   GET    /metrics                  -> Prometheus text metrics
+#   WS     /sessions/<id>/ws         send {"input": "..."}; receive {"type": "delta", "text"}
+#                                    while the reply streams, then {"type": "turn", ...}
+
+logger = logging.getLogger(__name__)
+
+# Engine steps block on LLM responses, so the pool bounds concurrently processed turns, not sessions.
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "128"))
+
+# Per-thread hook through which the current turn receives streamed reply text.
+_turn = threading.local()
+
+
+def server_llm_response(prompt, stream_field=None):
+    """The engine's LLM callable: streams to the current turn's listener if it has one."""
+    gateway = get_gateway()
+    on_text = getattr(_turn, "on_text", None)
+    try:
+        if stream_field and on_text:
+            streamer = JSONFieldStreamer(stream_field)
+            chunks = []
+            for delta in gateway.stream(prompt):
+                chunks.append(delta)
+                text = streamer.feed(delta)
+                if text:
+                    on_text(text)
+            return "".join(chunks)
+        return gateway.complete(prompt)
+    except Exception:
+        logger.exception("LLM call failed")
+        return None
+
+
+class InterviewService:
+    """Runs engine turns for stored sessions, one turn at a time per session."""
+
+    def __init__(self, engine: InterviewEngine, store, workers: int = SERVER_WORKERS):
+        self.engine = engine
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="interview")
+        # A session's lock lives only while a turn holds or waits on it, so deleted, finished
+        # and evicted sessions leave nothing behind.
+        self._locks = weakref.WeakValueDictionary()
+        store.on_evict(engine.evicted_listener(store))
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    def create(self):
+        state = self.engine.new_state()
+        self.store.put(state)
+        return state
+
+    def get(self, session_id: str):
+        return self.store.get(session_id)
+
+    async def delete(self, session_id: str):
+        # Waits for a running turn, which would otherwise store the session again when it finishes.
+        async with self._lock(session_id):
+            state = self.store.get(session_id)
+            if state is not None:
+                self.engine.reset(state)
+            self.store.delete(session_id)
+
+    def _step(self, state, user_input: str, on_text):
+        _turn.on_text = on_text
+        try:
+            state, replies = self.engine.step(state, user_input)
+        finally:
+            _turn.on_text = None
+        self.store.put(state)
+        return state, replies
+
+    async def step(self, session_id: str, user_input: str, on_text=None):
+        """Processes one turn; returns (state, replies) or None if the session is unknown."""
+        if self.store.get(session_id) is None:
+            return None
+        async with self._lock(session_id):
+            state = self.store.get(session_id)
+            if state is None:
+                return None
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._step, state, user_input, on_text)
+
+
+def turn_payload(state, replies) -> dict:
+    return {"session_id": state.session_id, "stage": state.conversation_stage, "replies": replies}
+
+
+# --- HANDLERS ---
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, service: InterviewService):
+        self.service = service
+
+    def write_json(self, payload: dict, status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason}, status=status_code)
+
+    def require_session(self, session_id: str):
+        state = self.service.get(session_id)
+        if state is None:
+            raise tornado.web.HTTPError(404, reason="Unknown session")
+        return state
+
+    def read_input(self) -> str:
+        try:
+            user_input = json.loads(self.request.body or b"{}").get("input")
+        except (json.JSONDecodeError, AttributeError):
+            user_input = None
+        if not isinstance(user_input, str) or not user_input.strip():
+            raise tornado.web.HTTPError(400, reason='Body must be JSON with a non-empty "input" string')
+        return user_input.strip()
+
+
+class SessionsHandler(BaseHandler):
+    def post(self):
+        state = self.service.create()
+        self.write_json(turn_payload(state, [message["content"] for message in state.messages]), status=201)
+
+
+class SessionHandler(BaseHandler):
+    def get(self, session_id):
+        state = self.require_session(session_id)
+        self.write_json({
+            "session_id": state.session_id,
+            "stage": state.conversation_stage,
+            "candidate_info": state.candidate_info,
+            "messages": list(state.messages),
+        })
+
+    async def delete(self, session_id):
+        self.require_session(session_id)
+        await self.service.delete(session_id)
+        self.set_status(204)
+        self.finish()
+
+
+class TurnHandler(BaseHandler):
+    async def post(self, session_id):
+        user_input = self.read_input()
+        result = await self.service.step(session_id, user_input)
+        if result is None:
+            raise tornado.web.HTTPError(404, reason="Unknown session")
+        self.write_json(turn_payload(*result))
+
+
+class StatsHandler(BaseHandler):
+    async def get(self):
+        # Both block (sizing every resident state, waiting on the gateway loop), so neither runs on the IO loop.
+        loop = asyncio.get_running_loop()
+        sessions, llm = await asyncio.gather(
+            loop.run_in_executor(None, self.service.store.stats),
+            loop.run_in_executor(None, lambda: get_gateway().metrics()),
+        )
+        self.write_json({"sessions": sessions, "llm": llm})
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.finish(render_prometheus())
+
+
+class TraceHandler(BaseHandler):
+    def get(self, session_id):
+        self.set_header("Content-Type", "application/x-ndjson")
+        self.finish(TRACES.dump_jsonl(session_id))
+
+
+class InterviewSocket(tornado.websocket.WebSocketHandler):
+    def initialize(self, service: InterviewService):
+        self.service = service
+
+    def open(self, session_id):
+        if self.service.get(session_id) is None:
+            self.close(code=4404, reason="Unknown session")
+            return
+        self.session_id = session_id
+
+    async def on_message(self, message):
+        try:
+            user_input = json.loads(message).get("input")
+        except (json.JSONDecodeError, AttributeError):
+            user_input = None
+        if not isinstance(user_input, str) or not user_input.strip():
+            await self.write_message({"type": "error", "error": 'Send JSON with a non-empty "input" string'})
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def on_text(text):
+            loop.call_soon_threadsafe(self._send, {"type": "delta", "text": text})
+
+        result = await self.service.step(self.session_id, user_input.strip(), on_text=on_text)
+        if result is None:
+            self.close(code=4404, reason="Unknown session")
+            return
+        self._send({"type": "turn", **turn_payload(*result)})
+
+    def _send(self, payload: dict):
+        try:
+            self.write_message(payload)
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+
+def make_app(service: InterviewService = None) -> tornado.web.Application:
+    if service is None:
+        prefetcher = Prefetcher(lambda prompt: get_gateway().submit(prompt, priority=PRIORITY_PREFETCH))
+        engine = InterviewEngine(server_llm_response, prefetcher=prefetcher, question_bank=get_question_bank())
+        service = InterviewService(engine, build_session_store_from_env())
+    args = {"service": service}
+    return tornado.web.Application([
+        (r"/sessions", SessionsHandler, args),
+        (r"/sessions/([0-9a-f]+)", SessionHandler, args),
+        (r"/sessions/([0-9a-f]+)/turns", TurnHandler, args),
+        (r"/sessions/([0-9a-f]+)/ws", InterviewSocket, args),
+        (r"/sessions/([0-9a-f]+)/trace", TraceHandler, args),
+        (r"/stats", StatsHandler, args),
+        (r"/metrics", MetricsHandler, args),
+    ])
+
+
+async def serve(host: str, port: int):
+    app = make_app()
+    app.listen(port, address=host)
+    logger.info("Interview API listening on http://%s:%d", host, port)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the interview API server.")
+    parser.add_argument("--host", default=os.environ.get("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SERVER_PORT", "8000")))
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
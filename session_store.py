@@ -0,0 +1,249 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from engine import InterviewState
+
+# --- SESSION STORE ---
+# Interview state lives outside the web process's request handlers so any frontend
+# (Streamlit, the API server) can look sessions up by id. A store only needs `get`,
+# `put` and `delete`; swapping in a persistent backend does not touch the handlers.
+# Sessions idle for longer than `max_idle` seconds are evicted from memory; the SQLite
+# backend keeps them on disk and reloads them on the next access, which also recovers
+# in-progress interviews after a worker restart.
+
+SESSION_IDLE_SECONDS = 3600.0
+
+# Idle sessions are swept at most this often, on writes.
+EVICT_INTERVAL_SECONDS = 60.0
+
+
+def state_size(obj, _seen=None) -> int:
+    """Approximate deep size in bytes of a state object (dicts, sequences and __slots__)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(state_size(key, _seen) + state_size(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, deque)):
+        size += sum(state_size(item, _seen) for item in obj)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                size += state_size(getattr(obj, name), _seen)
+    return size
+
+
+class MemorySessionStore:
+    """
+    Keeps InterviewState objects in a process-local LRU dictionary. Sessions idle past
+    `max_idle` seconds, or beyond `max_resident` sessions, are dropped from memory.
+    """
+
+    # Whether an evicted session still exists (and can be resumed) after it leaves memory.
+    persistent = False
+
+    def __init__(self, max_idle: float = SESSION_IDLE_SECONDS, max_resident: int = None):
+        self.max_idle = max_idle
+        self.max_resident = max_resident
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._evict_listeners = []
+
+    def on_evict(self, listener):
+        """Registers `listener(session_id)`, called for each session dropped from memory by the store itself."""
+        self._evict_listeners.append(listener)
+
+    def _evicted(self, session_ids: list):
+        for session_id in session_ids:
+            for listener in self._evict_listeners:
+                listener(session_id)
+
+    def get(self, session_id: str):
+        """Returns the stored state, or None if the session does not exist."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (entry[0], time.monotonic())
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def put(self, state: InterviewState):
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            self._sessions[state.session_id] = (state, now)
+            self._sessions.move_to_end(state.session_id)
+            if self.max_resident is not None:
+                while len(self._sessions) > self.max_resident:
+                    evicted.append(self._sessions.popitem(last=False)[0])
+        self._evicted(evicted)
+        if now - self._last_sweep >= EVICT_INTERVAL_SECONDS:
+            self.evict_idle()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self) -> int:
+        """Drops sessions untouched for longer than `max_idle`; returns how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            # Entries are kept in access order, so idle sessions are at the front.
+            evicted = []
+            while self._sessions:
+                session_id, (_, last_access) = next(iter(self._sessions.items()))
+                if now - last_access <= self.max_idle:
+                    break
+                del self._sessions[session_id]
+                evicted.append(session_id)
+        self._evicted(evicted)
+        return len(evicted)
+
+    def stats(self) -> dict:
+        """Resident session count and their approximate memory footprint."""
+        with self._lock:
+            states = [state for state, _ in self._sessions.values()]
+        resident_bytes = sum(state_size(state) for state in states)
+        return {
+            "resident_sessions": len(states),
+            "resident_bytes": resident_bytes,
+            "bytes_per_session": resident_bytes // len(states) if states else 0,
+        }
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(MemorySessionStore):
+    """
+    Persists sessions to SQLite while keeping recently active ones resident. Each turn
+    writes a delta: the transcript is an append-only table that only receives the new
+    messages, and the remaining (small) state fields are rewritten as one JSON row.
+    """
+
+    persistent = True
+
+    def __init__(self, path: str, max_idle: float = SESSION_IDLE_SECONDS, max_resident: int = None):
+        super().__init__(max_idle=max_idle, max_resident=max_resident)
+        self._db_lock = threading.Lock()
+        self._persisted_messages = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, message_count INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+
+    def get(self, session_id: str):
+        state = super().get(session_id)
+        if state is None:
+            state = self.load(session_id)
+            if state is not None:
+                with self._db_lock:
+                    self._persisted_messages[session_id] = len(state.messages)
+                super().put(state)
+        return state
+
+    def load(self, session_id: str):
+        """Reads a session from disk without making it resident."""
+        with self._db_lock:
+            row = self._conn.execute("SELECT state, message_count FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            messages = [{"role": role, "content": content} for role, content in self._conn.execute(
+                "SELECT role, content FROM session_messages WHERE session_id = ? AND seq < ? ORDER BY seq",
+                (session_id, row[1]))]
+        return InterviewState.from_record(json.loads(row[0]), messages)
+
+    def session_ids(self, stage: str = None) -> list:
+        """Ids of all stored sessions, or only of those currently at `stage`, oldest first."""
+        with self._db_lock:
+            if stage is None:
+                rows = self._conn.execute("SELECT session_id FROM sessions ORDER BY updated")
+            else:
+                rows = self._conn.execute(
+                    "SELECT session_id FROM sessions WHERE json_extract(state, '$.conversation_stage') = ? ORDER BY updated", (stage,))
+            return [row[0] for row in rows]
+
+    def put(self, state: InterviewState):
+        self._write(state)
+        super().put(state)
+
+    def _write(self, state: InterviewState):
+        session_id = state.session_id
+        record = json.dumps(state.to_record(), separators=(",", ":"))
+        with self._db_lock:
+            persisted = self._persisted_messages.get(session_id)
+            if persisted is None:
+                row = self._conn.execute("SELECT message_count FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                persisted = row[0] if row else 0
+            new_messages = state.messages.messages[persisted:]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                    [(session_id, persisted + offset, message["role"], message["content"]) for offset, message in enumerate(new_messages)],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, state, message_count, updated) VALUES (?, ?, ?, ?)",
+                    (session_id, record, len(state.messages), time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # Otherwise the connection stays inside the failed transaction and every later BEGIN fails.
+                self._conn.execute("ROLLBACK")
+                raise
+            self._persisted_messages[session_id] = len(state.messages)
+
+    def delete(self, session_id: str):
+        super().delete(session_id)
+        with self._db_lock:
+            self._persisted_messages.pop(session_id, None)
+            self._conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def evict_idle(self) -> int:
+        evicted = super().evict_idle()
+        with self._lock:
+            resident = set(self._sessions)
+        with self._db_lock:
+            for session_id in [sid for sid in self._persisted_messages if sid not in resident]:
+                del self._persisted_messages[session_id]
+        return evicted
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._db_lock:
+            stats["stored_sessions"] = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+
+def build_session_store_from_env():
+    """
+    Builds the session store from SESSION_STORE_BACKEND ("memory" or "sqlite"),
+    SESSION_STORE_PATH, SESSION_IDLE_SECONDS and SESSION_MAX_RESIDENT.
+    """
+    backend_name = os.environ.get("SESSION_STORE_BACKEND", "memory").lower()
+    max_idle = float(os.environ.get("SESSION_IDLE_SECONDS", SESSION_IDLE_SECONDS))
+    max_resident = os.environ.get("SESSION_MAX_RESIDENT")
+    max_resident = int(max_resident) if max_resident else None
+    if backend_name == "sqlite":
+        return SQLiteSessionStore(os.environ.get("SESSION_STORE_PATH", "sessions.sqlite3"), max_idle=max_idle, max_resident=max_resident)
+    return MemorySessionStore(max_idle=max_idle, max_resident=max_resident)
@@ -0,0 +1,125 @@
+import functools
+import hashlib
+import re
+
+# --- NEAR-DUPLICATE QUESTIONS ---
+# Questions are compared by MinHash signatures over their word and word-pair shingles
+# (after lowercasing and dropping stopwords), so "How does garbage collection work in
+# Python?" and "Can you explain how Python's garbage collection works?" are caught as
+# the same question without any model call. An index buckets signatures by band (LSH),
+# so a lookup only compares against plausible matches; it serves a single interview's
+# history as well as a whole topic in the question bank.
+
+NUM_PERM = 64
+ROWS_PER_BAND = 2
+
+# Estimated Jaccard similarity at or above which two questions count as the same.
+DUPLICATE_THRESHOLD = 0.5
+
+# The coverage summary sent with assessment prompts lists at most this many questions.
+COVERAGE_MAX_QUESTIONS = 8
+COVERAGE_WORDS_PER_QUESTION = 6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME)
+    for i in range(NUM_PERM)
+]
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+STOPWORDS = frozenset("""
+a about an and are as at be between can could describe did do does explain for from give how i in is it its
+me of on or please s some tell that the their them there these this to use used using what when where which
+who why will with would you your
+""".split())
+
+
+def keywords(text: str) -> list:
+    """Lowercased content words of `text`, in order, with crude plural folding."""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def shingles(text: str) -> set:
+    words = keywords(text)
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+@functools.lru_cache(maxsize=8192)
+def signature(text: str) -> tuple:
+    """MinHash signature of a question's shingles (cached; the same questions recur every turn)."""
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+              for shingle in shingles(text)]
+    if not hashes:
+        return (_MERSENNE_PRIME,) * NUM_PERM
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(first: tuple, second: tuple) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+class QuestionIndex:
+    """Locality-sensitive index of questions for near-duplicate lookups."""
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = {}
+        self._buckets = {}
+
+    @classmethod
+    def from_questions(cls, questions, threshold: float = DUPLICATE_THRESHOLD):
+        index = cls(threshold)
+        for question in questions:
+            index.add(question)
+        return index
+
+    @staticmethod
+    def _bands(sig: tuple):
+        for start in range(0, NUM_PERM, ROWS_PER_BAND):
+            yield start, sig[start:start + ROWS_PER_BAND]
+
+    def add(self, question: str):
+        if not question or question in self._signatures:
+            return
+        sig = signature(question)
+        self._signatures[question] = sig
+        for band in self._bands(sig):
+            self._buckets.setdefault(band, []).append(question)
+
+    def find_duplicate(self, question: str):
+        """The indexed question most similar to `question` if it is a near-duplicate, else None."""
+        if not question:
+            return None
+        sig = signature(question)
+        candidates = {match for band in self._bands(sig) for match in self._buckets.get(band, ())}
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = similarity(sig, self._signatures[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def __contains__(self, question: str):
+        return self.find_duplicate(question) is not None
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+def coverage_summary(questions: list, max_questions: int = COVERAGE_MAX_QUESTIONS) -> str:
+    """
+    A bounded digest of what has been asked: a few keywords per question for the most
+    recent `max_questions`, so prompts do not grow with the length of the interview.
+    """
+    recent = [question for question in questions if question][-max_questions:]
+    gists = [" ".join(keywords(question)[:COVERAGE_WORDS_PER_QUESTION]) for question in recent]
+    return "; ".join(gist for gist in gists if gist) or "nothing yet"
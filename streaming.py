@@ -0,0 +1,116 @@
+import json
+
+# --- INCREMENTAL JSON FIELD EXTRACTION ---
+# The LLM answers every prompt with a JSON object, but only one string field of it
+# (e.g. "response" or "full_response") is shown to the candidate. This scanner walks
+# the partial JSON as tokens arrive and yields the decoded text of that one field, so
+# it can be rendered long before the object is closed and handed to json.loads.
+
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JSONFieldStreamer:
+    """
+    Incrementally decodes the value of a single top-level string field from a
+    streamed JSON object. Feed it raw chunks; it returns the newly decoded text.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.value = ""
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._expect_key = False
+        self._last_key = None
+        self._capturing = False
+        self._awaiting_value = False
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """True once the target field's closing quote has been seen."""
+        return self._done
+
+    def feed(self, chunk: str) -> str:
+        """Consumes a chunk of the raw completion and returns any newly decoded field text."""
+        self.buffer += chunk
+        before = len(self.value)
+        while self._pos < len(self.buffer) and not self._done:
+            if self._capturing:
+                if not self._read_value_char():
+                    break
+                continue
+            if not self._scan_char():
+                break
+        return self.value[before:]
+
+    def _read_value_char(self) -> bool:
+        """Decodes one (possibly escaped) character of the target value. Returns False if more input is needed."""
+        char = self.buffer[self._pos]
+        if char == '"':
+            self._pos += 1
+            self._capturing = False
+            self._done = True
+            return True
+        if char != '\\':
+            self.value += char
+            self._pos += 1
+            return True
+        if self._pos + 1 >= len(self.buffer):
+            return False
+        escape = self.buffer[self._pos + 1]
+        if escape == 'u':
+            hex_digits = self.buffer[self._pos + 2:self._pos + 6]
+            if len(hex_digits) < 4:
+                return False
+            try:
+                self.value += chr(int(hex_digits, 16))
+            except ValueError:
+                pass
+            self._pos += 6
+            return True
+        self.value += _SIMPLE_ESCAPES.get(escape, escape)
+        self._pos += 2
+        return True
+
+    def _scan_char(self) -> bool:
+        """Advances the structural scanner by one character. Returns False if more input is needed."""
+        char = self.buffer[self._pos]
+        if self._in_string:
+            if char == '\\':
+                if self._pos + 1 >= len(self.buffer):
+                    return False
+                self._pos += 2
+                return True
+            if char == '"':
+                self._in_string = False
+                if self._expect_key and self._depth == 1:
+                    self._last_key = json.loads(self.buffer[self._string_start:self._pos + 1])
+                    self._expect_key = False
+            self._pos += 1
+            return True
+
+        if self._awaiting_value and not char.isspace():
+            self._awaiting_value = False
+            if char == '"':
+                self._capturing = True
+                self._pos += 1
+                return True
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = self._pos
+        elif char in '{[':
+            self._depth += 1
+            self._expect_key = char == '{' and self._depth == 1
+        elif char in '}]':
+            self._depth -= 1
+        elif char == ',' and self._depth == 1:
+            self._expect_key = True
+        elif char == ':' and self._depth == 1 and self._last_key == self.field:
+            self._awaiting_value = True
+        self._pos += 1
+        return True
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+from batch import BatchCheckpoint, run_batch
+from decoding import decode_response
+from history import estimate_tokens, render_line
+from prompts import get_interview_summary_prompt, get_transcript_notes_prompt
+from scheduler import PRIORITY_BATCH
+
+# --- BATCH INTERVIEW SUMMARIES ---
+# Turns completed interviews from the session store into hiring-manager summaries.
+# Transcripts are summarized concurrently on the gateway loop at batch priority (so
+# live candidates are always served first), with a semaphore bounding how many are in
+# progress. Transcripts too long for one prompt are summarized map-reduce style: notes
+# are taken on each chunk in parallel and the summary is written from the notes. Like
+# every batch job (see batch.py), an interrupted run resumes where it stopped.
+
+DEFAULT_SUMMARY_PATH = "summaries.sqlite3"
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "8"))
+
+# Transcripts estimated above this many tokens are summarized in chunks of this size.
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "3000"))
+
+SUMMARY_KEYS = ("overall_summary", "technical_strengths", "areas_for_improvement", "final_recommendation")
+
+
+def chunk_transcript(messages: list, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> list:
+    """Splits a transcript into consecutive chunks of at most `max_tokens` (a message is never split)."""
+    chunks, current, current_tokens = [], [], 0
+    for message in messages:
+        tokens = estimate_tokens(render_line(message))
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(message)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SummaryCheckpoint(BatchCheckpoint):
+    """Output database of finished summaries; doubles as the record of batch progress."""
+
+    def __init__(self, path: str = DEFAULT_SUMMARY_PATH):
+        super().__init__(path, "summaries", "summary", {"chunks": "INTEGER NOT NULL"})
+
+
+class Summarizer:
+    """Summarizes transcripts through the gateway with at most `concurrency` interviews in flight."""
+
+    def __init__(self, gateway, concurrency: int = SUMMARY_CONCURRENCY, chunk_tokens: int = SUMMARY_CHUNK_TOKENS):
+        self.gateway = gateway
+        self.concurrency = concurrency
+        self.chunk_tokens = chunk_tokens
+
+    async def _complete_json(self, prompt) -> dict:
+        return decode_response(await self.gateway.acomplete(prompt, priority=PRIORITY_BATCH), prompt.kind)[0]
+
+    async def summarize(self, messages: list, candidate_info: dict):
+        """Returns (summary, chunk_count) for one transcript."""
+        chunks = chunk_transcript(messages, self.chunk_tokens)
+        if len(chunks) <= 1:
+            return await self._complete_json(get_interview_summary_prompt(messages, candidate_info)), 1
+        # Map: notes on every chunk in parallel. Reduce: the summary prompt over the notes.
+        notes = await asyncio.gather(*(
+            self._complete_json(get_transcript_notes_prompt(chunk, candidate_info, part, len(chunks)))
+            for part, chunk in enumerate(chunks, start=1)
+        ))
+        condensed = [{"role": f"notes on part {part}", "content": data.get("notes", "")}
+                     for part, data in enumerate(notes, start=1)]
+        return await self._complete_json(get_interview_summary_prompt(condensed, candidate_info)), len(chunks)
+
+    async def run_batch(self, store, session_ids: list, checkpoint: SummaryCheckpoint) -> dict:
+        """Summarizes every session not yet in the checkpoint; returns counts and throughput."""
+        async def summarize_state(state):
+            summary, chunks = await self.summarize(list(state.messages), state.candidate_info)
+            return {key: summary.get(key) for key in SUMMARY_KEYS}, {"chunks": chunks}
+
+        return await run_batch(store, session_ids, checkpoint, summarize_state, self.concurrency,
+                               done_key="summarized", rate_key="summaries_per_minute")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize completed interviews in bulk.")
+    parser.add_argument("--sessions", default=os.environ.get("SESSION_STORE_PATH", "sessions.sqlite3"),
+                        help="SQLite session store to read finished interviews from.")
+    parser.add_argument("--output", default=DEFAULT_SUMMARY_PATH, help="Summary database (also the resume checkpoint).")
+    parser.add_argument("--concurrency", type=int, default=SUMMARY_CONCURRENCY)
+    parser.add_argument("--chunk-tokens", type=int, default=SUMMARY_CHUNK_TOKENS)
+    parser.add_argument("--limit", type=int, help="Summarize at most this many sessions.")
+    parser.add_argument("--export", help="Also write all summaries to this JSONL file.")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    from llm import close_gateway, get_gateway
+    from session_store import SQLiteSessionStore
+
+    store = SQLiteSessionStore(args.sessions)
+    checkpoint = SummaryCheckpoint(args.output)
+    session_ids = store.session_ids(stage="finished")[:args.limit]
+    gateway = get_gateway()
+    summarizer = Summarizer(gateway, concurrency=args.concurrency, chunk_tokens=args.chunk_tokens)
+    result = gateway.run(summarizer.run_batch(store, session_ids, checkpoint)).result()
+    close_gateway()
+    print(json.dumps(result))
+    if args.export:
+        print(f"Exported {checkpoint.export_jsonl(args.export)} summaries to {args.export}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import os
+import re
+
+from question_bank import experience_band
+
+# --- TECHNOLOGY TAXONOMY ---
+# Canonical technologies with their category and the aliases candidates write them as.
+# Aliases are indexed in a word-level trie, so a free-text stack is read left to right
+# with longest-match lookups ("spring boot" before "spring", "ruby on rails" before
+# "ruby"), aliases collapse to one canonical name, and filler words and version
+# numbers ("React 18", "Python 3.11") are dropped.
+# One-word aliases that are also ordinary words or letters ("go", "swift", "c") only
+# count as technologies when they make up a whole list item or are written capitalised;
+# anywhere else they are left unrecognised, so the input goes to the LLM instead.
+
+TECHNOLOGIES = {
+    # Languages
+    "Python": ("language", ["python", "py"]),
+    "Java": ("language", ["java"]),
+    "JavaScript": ("language", ["javascript", "js", "ecmascript"]),
+    "TypeScript": ("language", ["typescript", "ts"]),
+    "C": ("language", ["c"]),
+    "C++": ("language", ["c++", "cpp"]),
+    "C#": ("language", ["c#", "csharp", "c sharp"]),
+    "Go": ("language", ["go", "golang"]),
+    "Rust": ("language", ["rust"]),
+    "Ruby": ("language", ["ruby"]),
+    "PHP": ("language", ["php"]),
+    "Kotlin": ("language", ["kotlin"]),
+    "Swift": ("language", ["swift"]),
+    "Scala": ("language", ["scala"]),
+    "R": ("language", ["r"]),
+    "Dart": ("language", ["dart"]),
+    "SQL": ("language", ["sql"]),
+    "Bash": ("language", ["bash", "shell scripting"]),
+    "HTML": ("frontend", ["html", "html5"]),
+    "CSS": ("frontend", ["css", "css3"]),
+    # Backend frameworks
+    "Django": ("backend", ["django", "django rest framework", "drf"]),
+    "Flask": ("backend", ["flask"]),
+    "FastAPI": ("backend", ["fastapi", "fast api"]),
+    "Spring Boot": ("backend", ["spring boot", "springboot", "spring"]),
+    "Hibernate": ("backend", ["hibernate"]),
+    "Node.js": ("backend", ["node", "node.js", "nodejs", "node js"]),
+    "Express": ("backend", ["express", "express.js", "expressjs"]),
+    ".NET": ("backend", [".net", "dotnet", "dot net", ".net core"]),
+    "ASP.NET": ("backend", ["asp.net", "asp.net core"]),
+    "Ruby on Rails": ("backend", ["rails", "ruby on rails", "ror"]),
+    "Laravel": ("backend", ["laravel"]),
+    "GraphQL": ("backend", ["graphql"]),
+    # Frontend
+    "React": ("frontend", ["react", "react.js", "reactjs", "react js"]),
+    "Angular": ("frontend", ["angular", "angularjs", "angular.js"]),
+    "Vue.js": ("frontend", ["vue", "vue.js", "vuejs"]),
+    "Next.js": ("frontend", ["next.js", "nextjs", "next js"]),
+    "Tailwind CSS": ("frontend", ["tailwind", "tailwind css", "tailwindcss"]),
+    # Mobile
+    "React Native": ("mobile", ["react native"]),
+    "Flutter": ("mobile", ["flutter"]),
+    "Android": ("mobile", ["android"]),
+    "iOS": ("mobile", ["ios"]),
+    # Data and machine learning
+    "Pandas": ("data", ["pandas"]),
+    "NumPy": ("data", ["numpy"]),
+    "TensorFlow": ("data", ["tensorflow"]),
+    "PyTorch": ("data", ["pytorch", "torch"]),
+    "scikit-learn": ("data", ["scikit-learn", "sklearn", "scikit learn"]),
+    "Spark": ("data", ["spark", "pyspark", "apache spark"]),
+    # Databases
+    "MySQL": ("database", ["mysql"]),
+    "PostgreSQL": ("database", ["postgresql", "postgres", "psql"]),
+    "SQLite": ("database", ["sqlite"]),
+    "MongoDB": ("database", ["mongodb", "mongo"]),
+    "Redis": ("database", ["redis"]),
+    "Oracle": ("database", ["oracle"]),
+    "SQL Server": ("database", ["sql server", "mssql", "ms sql"]),
+    "Cassandra": ("database", ["cassandra"]),
+    "Elasticsearch": ("database", ["elasticsearch", "elastic search"]),
+    "DynamoDB": ("database", ["dynamodb", "dynamo db"]),
+    "Firebase": ("database", ["firebase"]),
+    # Messaging
+    "Kafka": ("messaging", ["kafka", "apache kafka"]),
+    "RabbitMQ": ("messaging", ["rabbitmq", "rabbit mq"]),
+    # Cloud and infrastructure
+    "AWS": ("cloud", ["aws", "amazon web services"]),
+    "Azure": ("cloud", ["azure", "microsoft azure"]),
+    "GCP": ("cloud", ["gcp", "google cloud", "google cloud platform"]),
+    "Docker": ("devops", ["docker"]),
+    "Kubernetes": ("devops", ["kubernetes", "k8s"]),
+    "Terraform": ("devops", ["terraform"]),
+    "Jenkins": ("devops", ["jenkins"]),
+    "Git": ("tooling", ["git"]),
+    "Linux": ("tooling", ["linux"]),
+}
+
+# A technology that makes another redundant as a separate topic (asking about SQL and
+# then PostgreSQL covers the same ground).
+SUBSUMES = {
+    "PostgreSQL": ["SQL"], "MySQL": ["SQL"], "SQLite": ["SQL"], "SQL Server": ["SQL"], "Oracle": ["SQL"],
+    "Express": ["Node.js"], "ASP.NET": [".NET"], "Next.js": ["React"],
+}
+
+# Aliases that are also everyday words or single letters.
+AMBIGUOUS_ALIASES = {"go", "r", "c", "spring", "swift", "express"}
+
+# Words that may surround a tech list without being part of it.
+FILLER_WORDS = {
+    "and", "with", "also", "plus", "some", "i", "know", "use", "using", "am", "in", "im", "have",
+    "proficient", "experienced", "familiar", "my", "stack", "is", "a", "bit", "of", "etc", "the",
+    "languages", "language", "frameworks", "framework", "databases", "database", "tools", "mostly",
+    "mainly", "worked", "work", "on", "as", "well", "like", "basic", "basics", "good", "experience",
+    "but", "lots", "lot", "little", "few", "more", "most", "very", "quite", "much", "strong", "solid",
+    "deep", "knowledge", "expertise", "skills", "skill", "including", "such", "other", "things", "to",
+    "for", "at", "or", "an", "both", "currently", "recently", "learning", "advanced", "intermediate",
+    "beginner", "expert", "professional", "hands", "years", "year", "yrs", "months", "version", "versions",
+    "latest", "modern", "comfortable", "fluent", "prior", "previous", "me",
+}
+
+# Version numbers ("18", "3.11", "v5", "2.x") qualify the technology before them and are dropped.
+_VERSION = re.compile(r"v?\d+(?:\.(?:\d+|x))*\+?")
+
+# Splits a stack into pieces (each piece is matched word by word).
+SEPARATORS = re.compile(r"\s*(?:,|;|/|&|\||\band\b|\n)\s*", re.IGNORECASE)
+
+# A token: letters, digits and + # . - (so "c++", "c#", "node.js", ".net", "scikit-learn").
+_TOKEN = re.compile(r"\.?[a-z0-9+#][a-z0-9+#.\-]*", re.IGNORECASE)
+
+
+def tokenize(text: str, lower: bool = True) -> list:
+    if lower:
+        text = text.lower()
+    return [token.rstrip(".-") for token in _TOKEN.findall(text.replace("'", ""))]
+
+
+class AliasTrie:
+    """Word-level trie of aliases, each ending at the canonical name it stands for."""
+
+    _END = object()
+
+    def __init__(self, aliases: dict):
+        self._root = {}
+        for alias, canonical in aliases.items():
+            node = self._root
+            for word in tokenize(alias):
+                node = node.setdefault(word, {})
+            node[self._END] = canonical
+
+    def longest_match(self, words: list, start: int):
+        """(canonical, length) of the longest alias starting at words[start], or (None, 0)."""
+        node, best = self._root, (None, 0)
+        for position in range(start, len(words)):
+            node = node.get(words[position])
+            if node is None:
+                break
+            if self._END in node:
+                best = (node[self._END], position - start + 1)
+        return best
+
+
+ALIASES = {alias: canonical for canonical, (_, aliases) in TECHNOLOGIES.items() for alias in aliases}
+TRIE = AliasTrie(ALIASES)
+
+
+def category(technology: str) -> str:
+    return TECHNOLOGIES[technology][0] if technology in TECHNOLOGIES else "other"
+
+
+def read_pieces(text: str):
+    """
+    Yields (technologies, leftover) for each piece of a free-text tech stack: the canonical
+    names matched in it, in order, and the words it holds that the taxonomy does not know
+    (filler words and version numbers removed).
+    """
+    for piece in SEPARATORS.split(text.strip()):
+        written = tokenize(piece, lower=False)
+        words = [word.lower() for word in written]
+        whole_item = len([word for word in words if word not in FILLER_WORDS]) == 1
+        technologies, leftover, index = [], [], 0
+        while index < len(words):
+            canonical, length = TRIE.longest_match(words, index)
+            if canonical and length == 1 and words[index] in AMBIGUOUS_ALIASES \
+                    and not whole_item and not written[index][0].isupper():
+                canonical = None
+            if canonical:
+                technologies.append(canonical)
+                index += length
+                continue
+            if words[index] not in FILLER_WORDS and not _VERSION.fullmatch(words[index]):
+                leftover.append(words[index])
+            index += 1
+        yield technologies, leftover
+
+
+def parse_stack(text: str):
+    """
+    Reads a free-text tech stack. Returns (technologies, unknown): the canonical names
+    found, in order and without duplicates, and the pieces that held words the taxonomy
+    does not know (with filler words and version numbers removed).
+    """
+    found, unknown = [], []
+    for technologies, leftover in read_pieces(text):
+        found += [technology for technology in technologies if technology not in found]
+        if leftover:
+            unknown.append(" ".join(leftover))
+    return found, unknown
+
+
+def unknown_technologies(text: str) -> list:
+    """
+    Pieces of a tech stack that name no known technology at all ("Elixir" in "Python,
+    Elixir"); words left over next to a known one ("lots of SQL") are not technologies.
+    """
+    unknown = []
+    for technologies, leftover in read_pieces(text):
+        piece = " ".join(leftover)
+        if leftover and not technologies and piece not in unknown:
+            unknown.append(piece)
+    return unknown
+
+
+# --- TOPIC PLANNER ---
+# Picks a bounded assessment plan from the candidate's stack: at most a few topics,
+# depending on experience, chosen by how much each category matters for the role
+# (a data role is assessed on Pandas before Docker) and spread across categories.
+
+# Role keywords (matched in the desired position) -> category weights; unlisted categories weigh 1.
+ROLE_WEIGHTS = [
+    (("data", "machine learning", "ml", "ai", "analyst", "scientist"),
+     {"data": 3.0, "language": 2.0, "database": 1.5, "frontend": 0.3, "mobile": 0.3}),
+    (("devops", "sre", "site reliability", "cloud", "platform", "infrastructure"),
+     {"devops": 3.0, "cloud": 3.0, "tooling": 1.5, "frontend": 0.3, "mobile": 0.3}),
+    (("mobile", "android", "ios"),
+     {"mobile": 3.0, "language": 2.0, "frontend": 1.0, "devops": 0.5, "cloud": 0.5}),
+    (("full stack", "fullstack", "full-stack"),
+     {"backend": 2.0, "frontend": 2.0, "language": 1.5, "database": 1.5}),
+    (("frontend", "front-end", "front end", "ui", "web"),
+     {"frontend": 3.0, "language": 2.0, "backend": 0.7, "database": 0.5}),
+    (("backend", "back-end", "back end", "server", "api", "software", "developer", "engineer"),
+     {"backend": 2.5, "language": 2.0, "database": 1.8, "messaging": 1.5, "frontend": 0.5}),
+]
+
+# Weight of a piece the taxonomy does not recognise, and of each further pick from a category already in the plan.
+UNKNOWN_WEIGHT = 0.6
+REPEAT_CATEGORY_FACTOR = 0.5
+# Earlier-listed technologies are usually the candidate's main ones.
+LIST_POSITION_DECAY = 0.95
+
+TOPICS_BY_BAND = {"junior": 2, "mid": 3, "senior": 3}
+MAX_TOPICS = int(os.environ.get("ASSESSMENT_MAX_TOPICS", "4"))
+
+
+def role_weights(desired_position) -> dict:
+    position = f" {str(desired_position or '').lower()} "
+    for keywords, weights in ROLE_WEIGHTS:
+        if any(re.search(rf"\b{re.escape(keyword)}\b", position) for keyword in keywords):
+            return weights
+    return {}
+
+
+def topic_count(experience_years) -> int:
+    return min(MAX_TOPICS, TOPICS_BY_BAND[experience_band(experience_years)])
+
+
+def plan_topics(tech_stack: str, desired_position=None, experience_years=None) -> list:
+    """
+    The assessment topics for a candidate, best first: canonical technologies (and any
+    list items that name an unrecognised one) weighted by role, de-duplicated and capped
+    by experience.
+    """
+    technologies, _ = parse_stack(tech_stack or "")
+    redundant = {covered for technology in technologies for covered in SUBSUMES.get(technology, ())}
+    candidates = [technology for technology in technologies if technology not in redundant]
+    candidates += [piece.title() for piece in unknown_technologies(tech_stack or "")]
+    weights = role_weights(desired_position)
+    scores = {}
+    for position, topic in enumerate(candidates):
+        base = weights.get(category(topic), 1.0) if topic in TECHNOLOGIES else UNKNOWN_WEIGHT
+        scores[topic] = base * LIST_POSITION_DECAY ** position
+
+    plan, used = [], {}
+    while scores and len(plan) < topic_count(experience_years):
+        best = max(scores, key=lambda topic: scores[topic] * REPEAT_CATEGORY_FACTOR ** used.get(category(topic), 0))
+        plan.append(best)
+        used[category(best)] = used.get(category(best), 0) + 1
+        del scores[best]
+    return plan
@@ -0,0 +1,20 @@
+import pytest
+
+from classifiers import classify_name
+
+
+@pytest.mark.parametrize("text", [
+    "Good morning", "good evening", "Nice day", "Software Engineer", "Ask Later", "New Delhi",
+    "Senior Data Analyst", "Hello there", "New Open",
+])
+def test_non_names_go_to_the_llm(text):
+    assert classify_name(text) is None
+
+
+@pytest.mark.parametrize("text, name", [
+    ("Jane Doe", "Jane Doe"),
+    ("my name is arjun mehta", "Arjun Mehta"),
+    ("Maria Garcia Lopez", "Maria Garcia Lopez"),
+])
+def test_clean_names_are_accepted(text, name):
+    assert classify_name(text)[0] == name
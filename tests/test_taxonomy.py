@@ -0,0 +1,41 @@
+import pytest
+
+from classifiers import extract_technologies
+from taxonomy import parse_stack, plan_topics
+
+
+@pytest.mark.parametrize("stack, technologies", [
+    ("React 18 and TypeScript 5", ["React", "TypeScript"]),
+    ("Python 3", ["Python"]),
+    ("Python 3.11, Node.js v18, Vue 2.x", ["Python", "Node.js", "Vue.js"]),
+])
+def test_versions_are_dropped(stack, technologies):
+    assert parse_stack(stack) == (technologies, [])
+
+
+def test_versioned_stack_plans_only_technologies():
+    assert sorted(plan_topics("React 18 and TypeScript 5", "Backend Engineer", 1)) == ["React", "TypeScript"]
+    assert plan_topics("Python 3", "Backend Engineer", 5) == ["Python"]
+
+
+@pytest.mark.parametrize("stack, topics", [
+    ("Python, lots of SQL", {"Python", "SQL"}),
+    ("mainly Python but also a little bit of Terraform", {"Python", "Terraform"}),
+])
+def test_prose_stack_plans_only_technologies(stack, topics):
+    assert set(plan_topics(stack, "Backend Engineer", 5)) == topics
+
+
+def test_wholly_unknown_item_is_a_topic():
+    assert "Elixir" in plan_topics("Python, Elixir", "Backend Engineer", 5)
+
+
+@pytest.mark.parametrize("text, technologies", [
+    ("Python, go, Django", ["Python", "Go", "Django"]),
+    ("Python and Go", ["Python", "Go"]),
+    ("swift", ["Swift"]),
+    ("I go to the gym", []),
+    ("java spring", []),
+])
+def test_ambiguous_aliases_need_context(text, technologies):
+    assert extract_technologies(text) == technologies
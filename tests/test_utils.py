@@ -0,0 +1,31 @@
+import math
+
+import pandas as pd
+
+from utils import validate_column, validate_records
+
+
+def test_plain_values():
+    assert validate_column(["a@b.com", None, "", float("nan"), "nope"], "email") == [
+        None, "is missing", "is missing", "is missing", "is missing an @"]
+
+
+def test_nullable_string_column():
+    reasons = validate_column(pd.Series(["a@b.com", None, pd.NA], dtype="string"), "email")
+    assert reasons.tolist() == [None, "is missing", "is missing"]
+
+
+def test_nullable_records():
+    frame = pd.DataFrame({
+        "full_name": pd.Series(["Jane Doe", pd.NA], dtype="string"),
+        "experience_years": pd.Series([5, pd.NA], dtype="Int64"),
+        "phone_number": pd.Series(["9876543210", None], dtype="string"),
+    })
+    reasons = validate_records(frame)
+    assert reasons.loc[0].isna().all()
+    assert reasons.loc[1].tolist() == ["is missing", "is missing", "is missing"]
+
+
+def test_float_experience_with_gaps():
+    assert validate_column(pd.Series([5.0, math.nan, 70.0]), "experience_years").tolist() == [
+        None, "is missing", "must be between 0 and 60 years"]
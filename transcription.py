@@ -0,0 +1,137 @@
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from metrics import VOICE_DECODE_SECONDS, VOICE_RECOGNIZE_SECONDS, TRACES
+
+# --- VOICE TRANSCRIPTION ---
+# Recorded audio is decoded exactly once, straight to 16 kHz mono 16-bit PCM, and handed
+# to the recognizer as AudioData (no intermediate WAV export and re-read). Decoding and
+# recognition run on a shared worker pool so concurrent sessions do not serialize on
+# each other, and each utterance reports how long both steps took. SpeechRecognition and
+# pydub are imported on the first utterance, not when the app starts.
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", "4"))
+TRANSCRIBE_TIMEOUT = 30.0
+
+
+class Transcription(NamedTuple):
+    text: str
+    backend: str
+    audio_seconds: float
+    decode_seconds: float
+    recognize_seconds: float
+
+
+def decode_to_pcm(audio_bytes: bytes) -> bytes:
+    """Decodes any ffmpeg-readable recording to raw 16 kHz mono signed 16-bit PCM."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        result = subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-acodec", "pcm_s16le",
+             "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+            input=audio_bytes, capture_output=True, check=True,
+        )
+        return result.stdout
+    # Without ffmpeg, pydub can only read WAV (natively); resample it in memory.
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
+    return segment.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(SAMPLE_WIDTH).raw_data
+
+
+# --- RECOGNIZER BACKENDS ---
+# Each backend takes a Recognizer and AudioData and returns the transcript text.
+
+def recognize_google(recognizer, audio_data):
+    return recognizer.recognize_google(audio_data)
+
+def recognize_sphinx(recognizer, audio_data):
+    """Offline CMU Sphinx recognition (requires `pocketsphinx`)."""
+    return recognizer.recognize_sphinx(audio_data)
+
+def recognize_vosk(recognizer, audio_data):
+    """Offline Vosk recognition (requires `vosk` and a downloaded model)."""
+    return json.loads(recognizer.recognize_vosk(audio_data)).get("text", "")
+
+def recognize_whisper(recognizer, audio_data):
+    """Offline local Whisper recognition (requires `faster-whisper`)."""
+    return recognizer.recognize_faster_whisper(audio_data, model=os.environ.get("WHISPER_MODEL", "base"))
+
+RECOGNIZER_BACKENDS = {
+    "google": recognize_google,
+    "sphinx": recognize_sphinx,
+    "vosk": recognize_vosk,
+    "whisper": recognize_whisper,
+}
+
+
+class Transcriber:
+    """Runs decode + recognition for recorded utterances on a bounded worker pool."""
+
+    def __init__(self, backend: str = None, workers: int = TRANSCRIBE_WORKERS):
+        self.backend = backend or os.environ.get("TRANSCRIBER_BACKEND", "google")
+        if self.backend not in RECOGNIZER_BACKENDS:
+            raise ValueError(f"Unknown transcriber backend {self.backend!r}; choose from {sorted(RECOGNIZER_BACKENDS)}")
+        self._recognize = RECOGNIZER_BACKENDS[self.backend]
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe")
+        self._local = threading.local()
+
+    def _recognizer(self):
+        # Recognizers carry per-instance state, so each worker thread keeps its own.
+        if not hasattr(self._local, "recognizer"):
+            import speech_recognition as sr
+            self._local.recognizer = sr.Recognizer()
+        return self._local.recognizer
+
+    def _transcribe(self, audio_bytes: bytes, session_id: str = None) -> Transcription:
+        import speech_recognition as sr
+        started = time.perf_counter()
+        pcm = decode_to_pcm(audio_bytes)
+        decoded = time.perf_counter()
+        text = self._recognize(self._recognizer(), sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH))
+        finished = time.perf_counter()
+        result = Transcription(
+            text=text,
+            backend=self.backend,
+            audio_seconds=len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH),
+            decode_seconds=decoded - started,
+            recognize_seconds=finished - decoded,
+        )
+        logger.info("Transcribed %.1fs of audio with %s: decode %.3fs, recognize %.3fs",
+                    result.audio_seconds, result.backend, result.decode_seconds, result.recognize_seconds)
+        VOICE_DECODE_SECONDS.observe(result.decode_seconds)
+        VOICE_RECOGNIZE_SECONDS.observe(result.recognize_seconds, backend=result.backend)
+        TRACES.record("voice", session_id=session_id, backend=result.backend, audio_seconds=round(result.audio_seconds, 3),
+                      decode_seconds=round(result.decode_seconds, 6), recognize_seconds=round(result.recognize_seconds, 6))
+        return result
+
+    def submit(self, audio_bytes: bytes, session_id: str = None):
+        """Queues an utterance; the returned future resolves to a Transcription."""
+        return self._executor.submit(self._transcribe, audio_bytes, session_id)
+
+    def transcribe(self, audio_bytes: bytes, timeout: float = TRANSCRIBE_TIMEOUT, session_id: str = None) -> Transcription:
+        return self.submit(audio_bytes, session_id=session_id).result(timeout=timeout)
+
+
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+def get_transcriber() -> Transcriber:
+    """Returns the process-wide transcriber, creating it on first use."""
+    global _transcriber
+    if _transcriber is None:
+        with _transcriber_lock:
+            if _transcriber is None:
+                _transcriber = Transcriber()
+    return _transcriber
@@ -1,63 +1,127 @@
+import math
 import re
-from lark import Lark, Transformer, v_args
+import sys
+
+# --- FIELD VALIDATORS ---
+# Each validator has an `*_error` form returning the reason a value is invalid (or None)
+# and an `is_valid_*` form returning a bool. Patterns are compiled once at import, so
+# validating a value is a single regex match rather than a parse.
 
 # A simple name validator
-def is_valid_name(name: str) -> bool:
+def name_error(name: str):
     """
-    Validates if the name has at least two words and contains only letters and spaces.
+    Rejects names with fewer than two words or characters other than letters and spaces.
     A very basic check.
     """
-    return len(name.split()) >= 2 and all(char.isalpha() or char.isspace() for char in name)
-
-# --- More advanced email validation using Lark ---
-# This is much more robust than a simple regex.
-email_grammar = r"""
-    ?start: email
-
-    ?email: local "@" domain
+    if len(name.split()) < 2:
+        return "must contain at least a first and last name"
+    if not all(char.isalpha() or char.isspace() for char in name):
+        return "may only contain letters and spaces"
+    return None
 
-    local: atom ("." atom)*
-    domain: atom ("." atom)*
-
-    atom: CNAME
-
-    %import common.CNAME
-    %import common.WS
-    %ignore WS
-"""
+def is_valid_name(name: str) -> bool:
+    return name_error(name) is None
 
-class TreeToEmail(Transformer):
-    def email(self, parts):
-        return "".join(parts)
-    def local(self, parts):
-        return ".".join(parts)
-    def domain(self, parts):
-        return ".".join(parts)
-    @v_args(inline=True)
-    def atom(self, part):
-        return str(part)
+# Email grammar: local "@" domain, where both parts are dot-separated atoms and an atom
+# is an identifier (a letter or underscore, then letters, digits or underscores).
+# Whitespace around any token is ignored.
+_WS = r"[ \t\f\r\n]*"
+_ATOM = r"[A-Za-z_][A-Za-z0-9_]*"
+_DOTTED = rf"{_ATOM}(?:{_WS}\.{_WS}{_ATOM})*"
+EMAIL_PATTERN = re.compile(rf"{_WS}{_DOTTED}{_WS}@{_WS}{_DOTTED}{_WS}")
 
-email_parser = Lark(email_grammar)
+def email_error(email: str):
+    if "@" not in email:
+        return "is missing an @"
+    if EMAIL_PATTERN.fullmatch(email) is None:
+        return "is not a valid email address"
+    return None
 
 def is_valid_email(email: str) -> bool:
-    """Validates email format using a grammar parser for robustness."""
-    try:
-        email_parser.parse(email)
-        return True
-    except Exception:
-        return False
+    """Validates email format against the email grammar."""
+    return EMAIL_PATTERN.fullmatch(email) is not None
 
 # Simple phone number validation (adjust regex for different country codes if needed)
+# This regex matches a 10-digit number, optionally with spaces, dashes, or parentheses.
+PHONE_PATTERN = re.compile(r"^\(?([0-9]{3})\)?[-. ]?([0-9]{3})[-. ]?([0-9]{4})$")
+
+def phone_error(phone: str):
+    if PHONE_PATTERN.match(phone) is None:
+        return "must be a 10-digit phone number"
+    return None
+
 def is_valid_phone(phone: str) -> bool:
     """Validates a 10-digit phone number."""
-    # This regex matches a 10-digit number, optionally with spaces, dashes, or parentheses.
-    pattern = re.compile(r"^\(?([0-9]{3})\)?[-. ]?([0-9]{3})[-. ]?([0-9]{4})$")
-    return pattern.match(phone) is not None
+    return PHONE_PATTERN.match(phone) is not None
 
-def is_valid_experience(experience: str) -> bool:
-    """Validates that experience is a number between 0 and 60."""
+def experience_error(experience: str):
     try:
         exp = int(experience)
-        return 0 <= exp <= 60
     except ValueError:
-        return False
\ No newline at end of file
+        return "must be a whole number of years"
+    if not 0 <= exp <= 60:
+        return "must be between 0 and 60 years"
+    return None
+
+def is_valid_experience(experience: str) -> bool:
+    """Validates that experience is a number between 0 and 60."""
+    return experience_error(experience) is None
+
+
+# --- BULK VALIDATION ---
+# Validates whole columns of imported candidate records (plain lists or pandas Series /
+# DataFrames) in one call. The result holds one reason per value, None where it is valid.
+
+FIELD_VALIDATORS = {
+    "full_name": name_error,
+    "email": email_error,
+    "phone_number": phone_error,
+    "experience_years": experience_error,
+}
+
+def _is_missing(value) -> bool:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return True
+    # Values from a DataFrame can be NaN, NaT or (in nullable dtypes) pd.NA, whose truth value is ambiguous.
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+    return isinstance(value, float) and math.isnan(value)
+
+def _as_text(value) -> str:
+    # Numeric columns arrive as floats when they contain empty cells (5.0 for "5").
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value if isinstance(value, str) else str(value)
+
+def validate_column(values, field: str):
+    """
+    Returns the reason each value of `field` is invalid, or None for valid values. A pandas
+    Series in gives a Series (with the same index) out; any other iterable gives a list.
+    """
+    error = FIELD_VALIDATORS[field]
+    reasons = [
+        "is missing" if _is_missing(value) else error(_as_text(value))
+        for value in values
+    ]
+    if hasattr(values, "index") and hasattr(values, "dtype"):
+        import pandas as pd
+        return pd.Series(reasons, index=values.index, name=getattr(values, "name", field), dtype=object)
+    return reasons
+
+def validate_records(records, fields=None):
+    """
+    Validates every known field present in `records`: a pandas DataFrame (returns a
+    DataFrame of reasons with the same index) or a list of dicts (returns one
+    {field: reason} dict per record, listing only invalid fields).
+    """
+    if hasattr(records, "columns"):
+        import pandas as pd
+        columns = [field for field in (fields or FIELD_VALIDATORS) if field in records.columns]
+        return pd.DataFrame({field: validate_column(records[field], field) for field in columns}, index=records.index)
+
+    records = list(records)
+    fields = fields or [field for field in FIELD_VALIDATORS if any(field in record for record in records)]
+    columns = {field: validate_column([record.get(field) for record in records], field) for field in fields}
+    return [{field: columns[field][row] for field in fields if columns[field][row] is not None}
+            for row in range(len(records))]